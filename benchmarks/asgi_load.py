@@ -0,0 +1,120 @@
+"""Front-page latency while OpenTDB is slow: sync workers vs the ASGI mode.
+
+Starts a slow local OpenTDB stub, then for each serving mode starts gunicorn
+with the same number of workers and runs two kinds of clients at once:
+
+* "slow" clients that keep requesting quiz batches for cold buckets, so every
+  request waits on the stub's latency or on the OpenTDB rate limiter,
+* one probe that requests / in a loop and records its latency.
+
+Under sync workers the slow clients occupy every worker and the probe queues
+behind them; under the ASGI mode the probe should stay in the millisecond range.
+
+Usage:
+    python benchmarks/asgi_load.py --upstream-latency 3 --slow-clients 8 --duration 15
+    python benchmarks/asgi_load.py --modes asgi --output /tmp/asgi_load.json
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.common import start_server, stop_server, summarize, write_results
+from tools.opentdb_stub import CATEGORIES, DIFFICULTIES, start_in_thread
+
+
+def slow_client(base_url, stop, results):
+    session = requests.Session()
+    rng = random.Random()
+    while not stop.is_set():
+        params = {"category": rng.choice(CATEGORIES)["id"], "difficulty": rng.choice(DIFFICULTIES),
+                  "type": rng.choice(["multiple", "boolean"]), "amount": 10}
+        started = time.perf_counter()
+        try:
+            session.get(base_url + "/api/fetch_quiz_questions", params=params, timeout=60)
+            results.append(time.perf_counter() - started)
+        except requests.exceptions.RequestException:
+            results.append(None)
+
+
+def probe(base_url, stop, results, interval):
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            session.get(base_url + "/", timeout=60).raise_for_status()
+            results.append(time.perf_counter() - started)
+        except requests.exceptions.RequestException:
+            results.append(None)
+        stop.wait(interval)
+
+
+def run_mode(mode, args, stub_url, workdir):
+    process, base_url = start_server(mode, args.workers, stub_url, workdir)
+    try:
+        baseline = []
+        stop = threading.Event()
+        threading.Timer(2.0, stop.set).start()
+        probe(base_url, stop, baseline, args.probe_interval)
+
+        stop = threading.Event()
+        slow, index = [], []
+        threads = [threading.Thread(target=slow_client, args=(base_url, stop, slow), daemon=True)
+                   for _ in range(args.slow_clients)]
+        for t in threads:
+            t.start()
+        time.sleep(0.5)  # let the slow requests occupy the workers first
+        threading.Timer(args.duration, stop.set).start()
+        probe(base_url, stop, index, args.probe_interval)
+        for t in threads:
+            t.join(timeout=70)
+    finally:
+        stop_server(process)
+
+    return {
+        "index_idle": summarize([v for v in baseline if v is not None]),
+        "index_under_load": summarize([v for v in index if v is not None]),
+        "index_errors": sum(1 for v in index if v is None),
+        "slow_requests": summarize([v for v in slow if v is not None]),
+        "slow_errors": sum(1 for v in slow if v is None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default="sync,asgi", help="comma-separated: sync, asgi")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--upstream-latency", type=float, default=3.0)
+    parser.add_argument("--slow-clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    stub, stub_url = start_in_thread(latency=args.upstream_latency)
+    results = {"config": {k: v for k, v in vars(args).items() if k != "output"}, "modes": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.modes.split(","):
+            print(f"Running {mode} ({args.workers} workers, {args.slow_clients} slow clients, "
+                  f"{args.upstream_latency}s upstream latency)...")
+            results["modes"][mode] = run_mode(mode, args, stub_url, workdir)
+    stub.shutdown()
+
+    print(f"{'mode':<6} {'idle p50':>9} {'load p50':>9} {'load p95':>9} {'load max':>9} {'probes':>7} {'slow done':>10}")
+    for mode, r in results["modes"].items():
+        idle, load = r["index_idle"], r["index_under_load"]
+        print(f"{mode:<6} {idle.get('p50_ms', '-'):>9} {load.get('p50_ms', '-'):>9} {load.get('p95_ms', '-'):>9} "
+              f"{load.get('max_ms', '-'):>9} {load['count']:>7} {r['slow_requests']['count']:>10}")
+    write_results({"asgi_load": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
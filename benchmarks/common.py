@@ -0,0 +1,144 @@
+"""Helpers shared by the benchmark scripts: timing summaries, servers and result files."""
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# gunicorn arguments per serving mode (see README "Async Serving Mode")
+SERVER_MODES = {
+    "sync": ["src.main:app"],
+    "asgi": ["-k", "uvicorn_worker.UvicornWorker", "src.asgi:app"],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def summarize(latencies, elapsed=None):
+    """Latency percentiles in milliseconds for a list of durations in seconds.
+
+    With `elapsed` (wall-clock seconds the samples were taken over) the
+    summary also carries the throughput.
+    """
+    ms = [v * 1000 for v in latencies]
+    summary = {"count": len(ms)}
+    if ms:
+        summary.update({
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3),
+            "max_ms": round(max(ms), 3),
+            "mean_ms": round(statistics.fmean(ms), 3),
+        })
+    if elapsed:
+        summary["requests_per_sec"] = round(len(ms) / elapsed, 1)
+    return summary
+
+
+def time_calls(func, iterations=None, duration=None):
+    """Calls func repeatedly for `iterations` calls or `duration` seconds; returns (latencies, elapsed)."""
+    latencies = []
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+    while (iterations is None or len(latencies) < iterations) and (deadline is None or time.perf_counter() < deadline):
+        t = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - started
+
+
+def measure(func, duration):
+    """Calls func for `duration` seconds and summarizes latency and throughput."""
+    latencies, elapsed = time_calls(func, duration=duration)
+    return summarize(latencies, elapsed)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def app_env(stub_url, workdir, name="bench"):
+    """Environment for an app instance that talks to the stub and keeps its state in workdir."""
+    return {
+        "OPENTDB_BASE_URL": stub_url,
+        "QUESTION_PREFETCH": "0",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, name + '.db')}",
+        "QUIZ_BATCH_STORE": f"sqlite:///{os.path.join(workdir, name + '_batches.db')}",
+    }
+
+
+def start_server(mode, workers, stub_url, workdir):
+    """Starts gunicorn in the given serving mode and returns (process, base_url) once / answers."""
+    port = free_port()
+    env = dict(os.environ, **app_env(stub_url, workdir, mode))
+    cmd = [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}",
+           "--timeout", "120", "--log-level", "warning"] + SERVER_MODES[mode]
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url + "/", timeout=2).status_code == 200:
+                return process, base_url
+        except requests.exceptions.RequestException:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata():
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(results, path=None):
+    """Writes results plus run metadata as JSON; defaults to benchmarks/results/<time>-<commit>.json."""
+    payload = {"meta": metadata(), **results}
+    if path is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{payload['meta']['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"Results written to {path}")
+    return path
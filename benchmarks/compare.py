@@ -0,0 +1,85 @@
+"""Compares two benchmark result files and flags regressions.
+
+Every numeric metric present in both files is compared. Latencies and
+durations (*_ms, *_seconds) regress when they go up; throughputs
+(requests_per_sec, mb_per_sec) regress when they go down. Counts and sizes are
+listed only with --all.
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/old.json benchmarks/results/new.json
+    python benchmarks/compare.py old.json new.json --threshold 10 --fail
+"""
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("_ms", "_seconds")
+HIGHER_IS_BETTER = ("requests_per_sec", "mb_per_sec")
+
+
+def flatten(data, prefix=""):
+    """Yields (dotted.path, value) for every number in a nested dict."""
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def direction(path):
+    name = path.rsplit(".", 1)[-1]
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    return 0
+
+
+def compare(old, new, threshold):
+    """Returns rows of (path, old, new, change %, status) for metrics in both runs."""
+    old_metrics = dict(flatten({k: v for k, v in old.items() if k != "meta"}))
+    rows = []
+    for path, new_value in flatten({k: v for k, v in new.items() if k != "meta"}):
+        if path not in old_metrics:
+            continue
+        old_value = old_metrics[path]
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        sign = direction(path)
+        status = ""
+        if sign and abs(change) >= threshold:
+            status = "better" if change * sign > 0 else "REGRESSION"
+        rows.append((path, old_value, new_value, change, status, sign))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change worth flagging")
+    parser.add_argument("--all", action="store_true", help="also list counts, sizes and unchanged metrics")
+    parser.add_argument("--fail", action="store_true", help="exit with status 1 on any regression")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"old: {old.get('meta', {}).get('commit')} ({old.get('meta', {}).get('timestamp')})")
+    print(f"new: {new.get('meta', {}).get('commit')} ({new.get('meta', {}).get('timestamp')})")
+
+    rows = compare(old, new, args.threshold)
+    regressions = 0
+    for path, old_value, new_value, change, status, sign in rows:
+        if not args.all and (not sign or not status):
+            continue
+        regressions += status == "REGRESSION"
+        print(f"{path:<60} {old_value:>12g} -> {new_value:<12g} {change:>+8.1f}%  {status}")
+    print(f"{regressions} regression(s) over {args.threshold:g}% in {len(rows)} shared metrics")
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
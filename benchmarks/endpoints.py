@@ -0,0 +1,84 @@
+"""Throughput and latency of the main routes through the Flask test client.
+
+Runs in-process against a local OpenTDB stub, so it measures the app itself
+(routing, caching, the question bank and batch store) without network noise:
+
+* GET / with and without a matching ETag,
+* GET /api/fetch_quiz_questions for a warm question-bank bucket,
+* GET /api/get_quiz_question walking a batch, refetching at the end.
+
+Usage:
+    python benchmarks/endpoints.py --duration 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.common import app_env, measure, write_results
+from tools.opentdb_stub import start_in_thread
+
+QUIZ_QUERY = "/api/fetch_quiz_questions?category=9&difficulty=easy&amount=50"
+
+
+def load_app(stub_url, workdir):
+    # src.main reads its configuration at import time
+    os.environ.update(app_env(stub_url, workdir))
+    from src.main import app
+    return app
+
+
+def run(duration=3.0):
+    stub, stub_url = start_in_thread()
+    with tempfile.TemporaryDirectory() as workdir:
+        app = load_app(stub_url, workdir)
+        client = app.test_client()
+        results = {}
+
+        def index():
+            assert client.get("/", headers={"Accept-Encoding": "br, gzip"}).status_code == 200
+        results["index"] = measure(index, duration)
+
+        etag = client.get("/").headers["ETag"]
+
+        def index_not_modified():
+            assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+        results["index_304"] = measure(index_not_modified, duration)
+
+        # The first call fills the bucket from the stub; the rest are served locally
+        assert client.get(QUIZ_QUERY).json["success"]
+
+        def fetch_quiz():
+            assert client.get(QUIZ_QUERY).json["success"]
+        results["fetch_quiz_questions"] = measure(fetch_quiz, duration)
+
+        def next_question():
+            data = client.get("/api/get_quiz_question").json
+            if data.get("end_of_batch"):
+                client.get(QUIZ_QUERY)
+        results["get_quiz_question"] = measure(next_question, duration)
+    stub.shutdown()
+    return results
+
+
+def print_report(results):
+    print(f"{'route':<22} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<22} {r['requests_per_sec']:>9} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per route")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+    results = run(args.duration)
+    print_report(results)
+    write_results({"endpoints": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
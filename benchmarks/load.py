@@ -0,0 +1,134 @@
+"""Concurrent load scenario against a real server, in the spirit of wrk/locust.
+
+Starts gunicorn (sync or ASGI workers) against a local OpenTDB stub and runs
+N client threads for a fixed duration. Each client behaves like a visitor:
+it loads the page, pages through a section, and plays quiz batches, picking
+actions by weight. Latency percentiles and throughput are reported per route.
+
+Usage:
+    python benchmarks/load.py --mode sync --clients 16 --duration 20
+    python benchmarks/load.py --mode asgi --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.common import SERVER_MODES, start_server, stop_server, summarize, write_results
+from tools.opentdb_stub import start_in_thread
+
+# (route label, weight)
+SCENARIO = [
+    ("index", 40),
+    ("section_page", 20),
+    ("fetch_quiz_questions", 5),
+    ("get_quiz_question", 30),
+    ("search", 5),
+]
+SECTIONS = ["events", "movies", "music", "sports"]
+SEARCH_TERMS = ["election", "movie", "tennis", "capital", "river"]
+QUIZ_PARAMS = {"category": 9, "difficulty": "easy", "amount": 50}
+
+
+def visitor(base_url, stop, samples, errors, seed):
+    session = requests.Session()
+    rng = random.Random(seed)
+    labels, weights = zip(*SCENARIO)
+    has_batch = False
+    while not stop.is_set():
+        label = rng.choices(labels, weights)[0]
+        if label == "get_quiz_question" and not has_batch:
+            label = "fetch_quiz_questions"
+        if label == "index":
+            url, params = "/", None
+        elif label == "section_page":
+            url, params = f"/api/sections/{rng.choice(SECTIONS)}", {"limit": 20}
+        elif label == "fetch_quiz_questions":
+            url, params = "/api/fetch_quiz_questions", QUIZ_PARAMS
+        elif label == "get_quiz_question":
+            url, params = "/api/get_quiz_question", None
+        else:
+            url, params = "/api/search", {"q": rng.choice(SEARCH_TERMS)}
+        started = time.perf_counter()
+        try:
+            response = session.get(base_url + url, params=params, timeout=60)
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 500:
+                errors[label] += 1
+                continue
+            samples[label].append(elapsed)
+            if label == "fetch_quiz_questions":
+                has_batch = response.json().get("success", False)
+            elif label == "get_quiz_question" and response.json().get("end_of_batch"):
+                has_batch = False
+        except requests.exceptions.RequestException:
+            errors[label] += 1
+
+
+def run(mode="sync", workers=2, clients=16, duration=20.0, upstream_latency=0.2, seed=0):
+    stub, stub_url = start_in_thread(latency=upstream_latency)
+    with tempfile.TemporaryDirectory() as workdir:
+        process, base_url = start_server(mode, workers, stub_url, workdir)
+        try:
+            # Fill the quiz bucket once so the scenario measures the steady state
+            requests.get(base_url + "/api/fetch_quiz_questions", params=QUIZ_PARAMS, timeout=60)
+            samples, errors = defaultdict(list), defaultdict(int)
+            stop = threading.Event()
+            threads = [threading.Thread(target=visitor, args=(base_url, stop, samples, errors, seed + i),
+                                        daemon=True) for i in range(clients)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            time.sleep(duration)
+            stop.set()
+            for t in threads:
+                t.join(timeout=70)
+            elapsed = time.perf_counter() - started
+        finally:
+            stop_server(process)
+    stub.shutdown()
+
+    routes = {label: dict(summarize(samples[label], elapsed), errors=errors[label]) for label, _ in SCENARIO}
+    everything = [v for values in samples.values() for v in values]
+    return {
+        "config": {"mode": mode, "workers": workers, "clients": clients, "duration": duration,
+                   "upstream_latency": upstream_latency},
+        "total": dict(summarize(everything, elapsed), errors=sum(errors.values())),
+        "routes": routes,
+    }
+
+
+def print_report(results):
+    print(f"{'route':<22} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in list(results["routes"].items()) + [("total", results["total"])]:
+        if not r["count"]:
+            continue
+        print(f"{name:<22} {r['requests_per_sec']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=sorted(SERVER_MODES), default="sync")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--upstream-latency", type=float, default=0.2)
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+    results = run(args.mode, args.workers, args.clients, args.duration, args.upstream_latency)
+    print_report(results)
+    write_results({"load": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
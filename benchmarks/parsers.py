@@ -0,0 +1,179 @@
+"""Micro-benchmarks for the process_data.py parsers and refresh().
+
+The real source files in src/static are a few kilobytes each, so the inputs
+are synthesized from them at several scales (1x, 100x, 1000x by default):
+events and list lines are repeated with a counter to keep them distinct, and
+movies are renumbered so ranks stay unique.
+
+Usage:
+    python benchmarks/parsers.py
+    python benchmarks/parsers.py --scales 1,100 --repeat 5 --output results/parsers.json
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import process_data
+from benchmarks.common import write_results
+
+SOURCE_DIR = process_data.DEFAULT_STATIC_DIR
+DEFAULT_SCALES = [1, 100, 1000]
+
+
+def _split_header(lines):
+    if lines and lines[0].startswith("#"):
+        return lines[:1], lines[1:]
+    return [], lines
+
+
+def scale_events(text, scale):
+    blocks = [b for b in text.split(process_data.EVENT_SEPARATOR) if b.strip()]
+    out = []
+    for i in range(scale):
+        for block in blocks:
+            out.append(block.replace("**Headline:** [", f"**Headline:** [#{i} ", 1) if i else block)
+    return process_data.EVENT_SEPARATOR.join(out)
+
+
+def scale_movies(text, scale):
+    lines = text.splitlines(keepends=True)
+    header, body = _split_header(lines)
+    entries, footer, current = [], [], None
+    for line in body:
+        stripped = line.strip()
+        if stripped.startswith("**") and ". " in stripped and stripped[2:stripped.index(".")].isdigit():
+            current = [stripped[stripped.index(". ") + 2:]]
+            entries.append(current)
+        elif stripped.startswith("Source:"):
+            footer.append(line)
+        elif current is not None and stripped:
+            current.append(line)
+    out = list(header) + ["\n"]
+    rank = 0
+    for i in range(scale):
+        for title, *rest in entries:
+            rank += 1
+            title = title if not i else title.replace("**", f" #{i}**", 1)
+            out.append(f"**{rank}. {title}\n")
+            out.extend(rest)
+            out.append("\n")
+    return "".join(out + footer)
+
+
+def scale_lines(text, scale):
+    header, body = _split_header(text.splitlines(keepends=True))
+    body = [line for line in body if line.strip()]
+    out = list(header)
+    for i in range(scale):
+        out.extend(body if not i else [f"{line.rstrip()} #{i}\n" for line in body])
+    return "".join(out)
+
+
+def make_inputs(directory, scale, source_dir=SOURCE_DIR):
+    """Writes every registered source file into directory at the given scale; returns total bytes."""
+    os.makedirs(directory, exist_ok=True)
+    total = 0
+    for name, filename, _ in process_data.SOURCE_REGISTRY:
+        with open(os.path.join(source_dir, filename), "r", encoding="utf-8") as f:
+            text = f.read()
+        if name == "events":
+            scaled = scale_events(text, scale)
+        elif name == "movies":
+            scaled = scale_movies(text, scale)
+        else:
+            scaled = scale_lines(text, scale)
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+            f.write(scaled)
+        total += len(scaled.encode("utf-8"))
+    return total
+
+
+def best_of(func, repeat):
+    """Runs func `repeat` times with its prints silenced; returns (best seconds, last result)."""
+    best, result = None, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_scale(scale, repeat, workdir):
+    directory = os.path.join(workdir, f"x{scale}")
+    total_bytes = make_inputs(directory, scale)
+    parsers = {}
+    for name, filename, processor in process_data.SOURCE_REGISTRY:
+        input_file = os.path.join(directory, filename)
+        seconds, result = best_of(lambda: processor(input_file, None), repeat)
+        items = sum(len(v) for v in (result or {}).values() if isinstance(v, list))
+        size = os.path.getsize(input_file)
+        parsers[name] = {
+            "input_bytes": size,
+            "items": items,
+            "best_seconds": round(seconds, 6),
+            "mb_per_sec": round(size / seconds / 1e6, 2) if seconds else None,
+        }
+
+    refresh = {}
+    cache_dir = os.path.join(directory, "cache")
+    for executor in ("thread", "process"):
+        def cold():
+            # Without the manifest every source is parsed again
+            manifest_file = os.path.join(cache_dir, process_data.MANIFEST_FILENAME)
+            if os.path.exists(manifest_file):
+                os.remove(manifest_file)
+            return process_data.refresh(directory, executor=executor, cache_dir=cache_dir)
+        seconds, _ = best_of(cold, repeat)
+        refresh[f"cold_{executor}_seconds"] = round(seconds, 6)
+    seconds, _ = best_of(lambda: process_data.refresh(directory, cache_dir=cache_dir), repeat)
+    refresh["warm_seconds"] = round(seconds, 6)
+    refresh["output_bytes"] = os.path.getsize(os.path.join(directory, "trivia_data.json"))
+    shutil.rmtree(directory, ignore_errors=True)
+    return {"input_bytes": total_bytes, "parsers": parsers, "refresh": refresh}
+
+
+def run(scales=None, repeat=3):
+    scales = scales or DEFAULT_SCALES
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            print(f"Parsing inputs at {scale}x...")
+            results[f"x{scale}"] = bench_scale(scale, repeat, workdir)
+    return results
+
+
+def print_report(results):
+    print(f"{'scale':<7} {'source':<14} {'bytes':>10} {'items':>8} {'best ms':>10} {'MB/s':>8}")
+    for scale, r in results.items():
+        for name, p in r["parsers"].items():
+            print(f"{scale:<7} {name:<14} {p['input_bytes']:>10} {p['items']:>8} "
+                  f"{p['best_seconds'] * 1000:>10.2f} {p['mb_per_sec'] or 0:>8}")
+        refresh = r["refresh"]
+        print(f"{scale:<7} refresh: cold thread {refresh['cold_thread_seconds'] * 1000:.1f} ms, "
+              f"cold process {refresh['cold_process_seconds'] * 1000:.1f} ms, "
+              f"warm {refresh['warm_seconds'] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+    results = run([int(s) for s in args.scales.split(",")], args.repeat)
+    print_report(results)
+    write_results({"parsers": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
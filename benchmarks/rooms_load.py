@@ -0,0 +1,262 @@
+"""Quiz room fan-out with hundreds of simulated listeners on one worker.
+
+Starts the ASGI server with a single worker (rooms live in the worker that
+created them), creates a room from a quiz batch, and connects N simulated
+participants from one asyncio loop. Each participant joins, listens on the
+room's event stream and answers every question after a random think time.
+The host then advances through the batch at a fixed pace.
+
+Reported: client-observed fan-out latency (question published -> received),
+answer POST latency, questions missed, listeners the server disconnected for
+lagging, and the worker's thread count with and without the listeners
+attached, which should stay flat since streams are coroutines, not threads.
+
+Usage:
+    python benchmarks/rooms_load.py --listeners 300 --questions 10
+    python benchmarks/rooms_load.py --listeners 500 --question-interval 1 --output /tmp/rooms.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.common import start_server, stop_server, summarize, write_results
+from tools.opentdb_stub import start_in_thread
+
+
+def worker_threads(master_pid):
+    """Thread count of the first gunicorn worker, or None where /proc is not available."""
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            worker_pid = int(f.read().split()[0])
+        with open(f"/proc/{worker_pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return None
+
+
+class Connection:
+    """Bare keep-alive HTTP/1.1 connection on asyncio streams.
+
+    Used instead of httpx: with hundreds of participants in one process, a
+    full client's own overhead would otherwise dominate the timings.
+    """
+
+    def __init__(self, base_url):
+        self.netloc = urlsplit(base_url).netloc
+        self.reader = self.writer = None
+
+    async def open(self):
+        host, port = self.netloc.rsplit(":", 1)
+        self.reader, self.writer = await asyncio.open_connection(host, int(port))
+        return self
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    async def send(self, method, path, data=None):
+        """Sends a request and returns (status, headers bytes) once the response headers arrive."""
+        if self.writer is None:
+            await self.open()
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        request = (f"{method} {path} HTTP/1.1\r\nHost: {self.netloc}\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+        self.writer.write(request)
+        status_line = await self.reader.readline()
+        if not status_line:
+            # The server dropped the idle keep-alive connection; retry once on a new one
+            self.close()
+            await self.open()
+            self.writer.write(request)
+            status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        return status, (await self.reader.readuntil(b"\r\n\r\n")).lower()
+
+    async def chunks(self, headers):
+        """Yields the response body in pieces: chunk by chunk, or in one piece with a Content-Length."""
+        if b"transfer-encoding: chunked" in headers:
+            while True:
+                size = int((await self.reader.readline()).strip() or b"0", 16)
+                data = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    return
+                yield data[:-2]
+        else:
+            length = int(headers.split(b"content-length:")[1].split(b"\r\n")[0])
+            yield await self.reader.readexactly(length)
+
+    async def request(self, method, path, data=None):
+        status, headers = await self.send(method, path, data)
+        body = b"".join([chunk async for chunk in self.chunks(headers)])
+        return status, json.loads(body) if body else None
+
+    async def events(self, path):
+        """Yields (event, data) pairs from an SSE stream until the server ends it."""
+        status, headers = await self.send("GET", path)
+        if status != 200:
+            raise ConnectionError(f"event stream returned {status}")
+        buffer = b""
+        async for chunk in self.chunks(headers):
+            buffer += chunk
+            while b"\n\n" in buffer:
+                block, buffer = buffer.split(b"\n\n", 1)
+                event, data = None, []
+                for line in block.decode("utf-8").split("\n"):
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        data.append(line[len("data: "):])
+                if event is not None:
+                    yield event, json.loads("\n".join(data))
+
+
+async def participant(base_url, room_path, name, think_time, stats, rng):
+    # One connection for requests and one held open for the event stream
+    api = await Connection(base_url).open()
+    status, joined = await api.request("POST", room_path + "/join", {"name": name})
+    participant_id = joined["participant_id"]
+    answers = []
+
+    async def answer(index, options):
+        await asyncio.sleep(rng.uniform(0, think_time))
+        started = time.perf_counter()
+        try:
+            status, _ = await api.request("POST", room_path + "/answer", {
+                "participant_id": participant_id, "index": index, "answer": rng.choice(options)})
+            stats["answer_latencies"].append(time.perf_counter() - started)
+            if status != 200:
+                stats["answers_rejected"] += 1
+        except (OSError, asyncio.IncompleteReadError):
+            stats["answer_errors"] += 1
+
+    seen = set()
+    try:
+        while True:
+            stream = Connection(base_url)
+            try:
+                stats["connected"] += 1
+                async for event, data in stream.events(room_path + "/events"):
+                    if event == "question" and data["index"] not in seen:
+                        seen.add(data["index"])
+                        stats["fanout_latencies"].append(time.time() - data["published_at"])
+                        # Answers share one connection, so they go out in order
+                        answers.append(asyncio.ensure_future(answer(data["index"], data["question"]["options"])))
+                    elif event == "tally":
+                        stats["tallies"] += 1
+                    elif event == "end":
+                        await asyncio.gather(*answers)
+                        return len(seen)
+                stats["reconnects"] += 1  # Closed by the server, e.g. for lagging
+            except (OSError, asyncio.IncompleteReadError):
+                stats["stream_errors"] += 1
+                await asyncio.sleep(0.5)
+            finally:
+                stream.close()
+    finally:
+        api.close()
+
+
+async def run_room(base_url, room_id, host_token, args, stats, master_pid):
+    room_path = f"/api/rooms/{room_id}"
+    host = await Connection(base_url).open()
+    rng = random.Random(args.seed)
+    tasks = [asyncio.ensure_future(participant(base_url, room_path, f"bot{i}", args.think_time, stats,
+                                               random.Random(rng.random())))
+             for i in range(args.listeners)]
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        _, state = await host.request("GET", room_path)
+        if state["listeners"] >= args.listeners:
+            break
+        await asyncio.sleep(0.2)
+    stats["listeners_attached"] = state["listeners"]
+    stats["threads_with_listeners"] = worker_threads(master_pid)
+
+    started = time.perf_counter()
+    for _ in range(args.questions + 1):  # The last call ends the room
+        await host.request("POST", room_path + "/next", {"host_token": host_token})
+        await asyncio.sleep(args.question_interval)
+    received = await asyncio.wait_for(asyncio.gather(*tasks), timeout=120)
+    stats["elapsed"] = time.perf_counter() - started
+    stats["questions_missed"] = sum(args.questions - n for n in received)
+    host.close()
+
+
+def run(listeners=300, questions=10, question_interval=1.0, think_time=0.5, seed=0):
+    args = argparse.Namespace(listeners=listeners, questions=questions, question_interval=question_interval,
+                              think_time=think_time, seed=seed)
+    stats = {"fanout_latencies": [], "answer_latencies": [], "answers_rejected": 0, "answer_errors": 0,
+             "connected": 0, "reconnects": 0, "stream_errors": 0, "tallies": 0}
+    stub, stub_url = start_in_thread()
+    with tempfile.TemporaryDirectory() as workdir:
+        process, base_url = start_server("asgi", 1, stub_url, workdir)
+        try:
+            host = requests.Session()
+            host.get(base_url + "/api/fetch_quiz_questions", params={"category": 9, "amount": questions},
+                     timeout=60).raise_for_status()
+            room = host.post(base_url + "/api/rooms", timeout=10).json()
+            stats["threads_idle"] = worker_threads(process.pid)
+            asyncio.run(run_room(base_url, room["room_id"], room["host_token"], args, stats, process.pid))
+            server = host.get(base_url + "/api/data_stats", timeout=10).json()["quiz_rooms"]
+        finally:
+            stop_server(process)
+    stub.shutdown()
+
+    return {
+        "config": {"listeners": listeners, "questions": questions, "question_interval": question_interval,
+                   "think_time": think_time},
+        "fanout": summarize(stats["fanout_latencies"]),
+        "answers": dict(summarize(stats["answer_latencies"], stats["elapsed"]),
+                        rejected=stats["answers_rejected"], errors=stats["answer_errors"]),
+        "listeners_attached": stats["listeners_attached"],
+        "questions_missed": stats["questions_missed"],
+        "reconnects": stats["reconnects"],
+        "stream_errors": stats["stream_errors"],
+        "tally_events_received": stats["tallies"],
+        "threads_idle": stats["threads_idle"],
+        "threads_with_listeners": stats["threads_with_listeners"],
+        "server": server,
+    }
+
+
+def print_report(results):
+    fanout, answers = results["fanout"], results["answers"]
+    print(f"listeners attached: {results['listeners_attached']}, questions missed: {results['questions_missed']}, "
+          f"reconnects: {results['reconnects']}, stream errors: {results['stream_errors']}")
+    print(f"fan-out latency   p50 {fanout.get('p50_ms')} ms, p95 {fanout.get('p95_ms')} ms, "
+          f"max {fanout.get('max_ms')} ms over {fanout['count']} deliveries")
+    print(f"answer POSTs      p50 {answers.get('p50_ms')} ms, p95 {answers.get('p95_ms')} ms, "
+          f"{answers.get('requests_per_sec')} req/s, {answers['rejected']} rejected, {answers['errors']} errors")
+    print(f"worker threads    {results['threads_idle']} idle, {results['threads_with_listeners']} with listeners")
+    print(f"server            {results['server']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listeners", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--question-interval", type=float, default=1.0, help="seconds between questions")
+    parser.add_argument("--think-time", type=float, default=0.5, help="max seconds before a listener answers")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+    results = run(args.listeners, args.questions, args.question_interval, args.think_time)
+    print_report(results)
+    write_results({"rooms_load": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
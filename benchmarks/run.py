@@ -0,0 +1,57 @@
+"""Runs the benchmark suites and saves one JSON result file per run.
+
+Files land in benchmarks/results/<time>-<commit>.json by default; compare two
+of them with benchmarks/compare.py to spot regressions between commits.
+
+Usage:
+    python benchmarks/run.py                       # parsers + endpoints + load
+    python benchmarks/run.py --suites parsers --scales 1,100
+    python benchmarks/run.py --quick               # short durations, small scales
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import endpoints, load, parsers
+from benchmarks.common import write_results
+
+SUITES = ["parsers", "endpoints", "load"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma-separated subset of: " + ", ".join(SUITES))
+    parser.add_argument("--quick", action="store_true", help="short durations and scales, for a smoke run")
+    parser.add_argument("--scales", help="parser input scales (default 1,100,1000; 1,100 with --quick)")
+    parser.add_argument("--duration", type=float, help="seconds per endpoint/load measurement")
+    parser.add_argument("--mode", choices=["sync", "asgi"], default="sync", help="server mode for the load suite")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    suites = [s for s in args.suites.split(",") if s]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    scales = [int(s) for s in (args.scales or ("1,100" if args.quick else "1,100,1000")).split(",")]
+
+    results = {}
+    if "parsers" in suites:
+        print("== parsers ==")
+        results["parsers"] = parsers.run(scales, repeat=1 if args.quick else 3)
+        parsers.print_report(results["parsers"])
+    if "endpoints" in suites:
+        print("== endpoints ==")
+        results["endpoints"] = endpoints.run(args.duration or (1.0 if args.quick else 3.0))
+        endpoints.print_report(results["endpoints"])
+    if "load" in suites:
+        print("== load ==")
+        results["load"] = load.run(args.mode, duration=args.duration or (5.0 if args.quick else 20.0))
+        load.print_report(results["load"])
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Builds fingerprinted, resized image assets for the quiz.
+
+Reads every image under src/static/images, detects its real type from the
+file contents (not the extension), and writes to src/static/assets:
+
+* resized WebP and AVIF variants at a few widths (never upscaled),
+* a full-size fallback in the original format,
+* SVGs copied as-is under a proper .svg extension,
+
+all with a content hash in the filename, plus manifest.json mapping each
+original path (as used in geo_quiz_data.json) to its variants. Because names
+change whenever content does, the app serves these with immutable caching.
+
+Usage:
+    python build_assets.py
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is only needed for raster variants
+    Image = None
+    features = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "static")
+SOURCE_DIR = os.path.join(STATIC_DIR, "images")
+OUTPUT_DIR = os.path.join(STATIC_DIR, "assets")
+VARIANT_WIDTHS = [320, 640, 1024]
+QUALITY = {"webp": 80, "avif": 55, "jpg": 85}
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "svg": "image/svg+xml",
+}
+
+
+def sniff_type(data):
+    """Returns the file extension matching the content, or None if unrecognised."""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    head = data[:512].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return "svg"
+    return None
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def write_asset(stem, data, ext, suffix=""):
+    """Writes data under a content-hashed name (skipping it if present) and returns the static-relative URL path."""
+    name = f"{stem}.{fingerprint(data)}{suffix}.{ext}"
+    path = os.path.join(OUTPUT_DIR, name)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return f"assets/{name}"
+
+
+def encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == "jpg":
+        image.convert("RGB").save(buffer, "JPEG", quality=QUALITY["jpg"], optimize=True, progressive=True)
+    elif fmt == "webp":
+        image.save(buffer, "WEBP", quality=QUALITY["webp"], method=6)
+    elif fmt == "avif":
+        image.save(buffer, "AVIF", quality=QUALITY["avif"])
+    return buffer.getvalue()
+
+
+def variant_formats():
+    formats = []
+    if Image is None:
+        return formats
+    if features.check("avif"):
+        formats.append("avif")
+    if features.check("webp"):
+        formats.append("webp")
+    return formats
+
+
+def build_raster(stem, data, ext):
+    entry = {"content_type": CONTENT_TYPES[ext], "variants": {}}
+    if Image is None:
+        print(f"Warning: Pillow not installed; {stem} gets a fingerprinted copy only.")
+        entry["src"] = write_asset(stem, data, ext)
+        return entry
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    entry["width"], entry["height"] = image.size
+    entry["src"] = write_asset(stem, data, ext)
+
+    widths = sorted({w for w in VARIANT_WIDTHS if w < image.width} | {image.width})
+    for fmt in variant_formats():
+        variants = []
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            variants.append({"src": write_asset(stem, encode(resized, fmt), fmt, f".{width}w"), "width": width})
+        entry["variants"][CONTENT_TYPES[fmt]] = variants
+    return entry
+
+
+def build(source_dir=SOURCE_DIR, output_dir=OUTPUT_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+    for filename in sorted(os.listdir(source_dir)):
+        path = os.path.join(source_dir, filename)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        ext = sniff_type(data)
+        if ext is None:
+            print(f"Warning: {filename} is not a recognised image. Skipping.")
+            continue
+        # Names like "world_map_outline.svg+xml" carry a MIME subtype, not an extension
+        stem = filename.split(".", 1)[0]
+        key = f"images/{filename}"
+        if ext == "svg":
+            manifest[key] = {"content_type": CONTENT_TYPES["svg"], "src": write_asset(stem, data, "svg"), "variants": {}}
+        else:
+            manifest[key] = build_raster(stem, data, ext)
+        variant_count = sum(len(v) for v in manifest[key]["variants"].values())
+        print(f"Built {key} -> {manifest[key]['src']} (+{variant_count} variants)")
+
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    # Drop stale fingerprints left over from older builds
+    live = {os.path.basename(e["src"]) for e in manifest.values()}
+    live |= {os.path.basename(v["src"]) for e in manifest.values() for vs in e["variants"].values() for v in vs}
+    for name in os.listdir(output_dir):
+        if name != "manifest.json" and name not in live:
+            os.remove(os.path.join(output_dir, name))
+    return manifest
+
+
+if __name__ == "__main__":
+    try:
+        build()
+    except Exception as e:
+        print(f"Error building assets: {e}")
+        sys.exit(1)
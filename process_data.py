@@ -1,41 +1,91 @@
+import hashlib
 import json
 import re
 import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.snapshot import BinarySnapshot, SnapshotError, VersionHasher, dump_snapshot, file_version
+
+# Patterns are compiled once at import instead of on every block
+MARKDOWN_LINK_RE = re.compile(r'\[(.*?)\]\((.*?)\)')
+HEADLINE_RE = re.compile(r'\*\*Headline:\*\* \[(.*?)\]\((.*?)\)')
+SUMMARY_RE = re.compile(r'\*\*Summary:\*\* (.*?)(?=\n\*\*|$)', re.DOTALL)
+PAREN_RE = re.compile(r'\((.*?)\)')
+EVENT_SEPARATOR = '---\n'
+# Matches "May 13, 2025", "Sept. 2, 2025" and ranges like "May 3-5, 2025" (first day wins)
+SOURCE_DATE_RE = re.compile(r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.? (\d{1,2})(?:[-\u2013]\d{1,2})?, (\d{4})\b')
+UNKNOWN_DATE = "Date not specified"
 
 def parse_markdown_links(text):
     """Parses markdown links like [Text](URL)"""
-    links = re.findall(r'\[(.*?)\]\((.*?)\)', text)
+    links = MARKDOWN_LINK_RE.findall(text)
     return links
 
-def process_current_events(input_file, output_file):
-    """Processes the markdown current events file into JSON, extracting links."""
-    events = []
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        blocks = content.split('---\n')
-        
-        for block in blocks:
+def parse_source_date(text):
+    """Returns the first date mentioned in text as a datetime.date, or None."""
+    for match in SOURCE_DATE_RE.finditer(text or ""):
+        month, day, year = match.groups()
+        try:
+            return datetime.strptime(f"{month[:3]} {day} {year}", "%b %d %Y").date()
+        except ValueError:
+            continue
+    return None
+
+def format_source_date(value):
+    return f"{value:%B} {value.day}, {value.year}"
+
+def _iter_blocks(lines, separator=EVENT_SEPARATOR):
+    """Yields the text between separators, holding only one block in memory.
+
+    Equivalent to content.split(separator) for a separator that ends in a newline.
+    """
+    block = []
+    for line in lines:
+        if line.endswith(separator):
+            block.append(line[:-len(separator)])
+            yield ''.join(block)
+            block = []
+        else:
+            block.append(line)
+    yield ''.join(block)
+
+def iter_current_events(input_file):
+    """Streams events from the markdown current events file, one block at a time."""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for block in _iter_blocks(f):
             if not block.strip() or block.startswith("#"):
                 continue
                 
-            headline_match = re.search(r'\*\*Headline:\*\* \[(.*?)\]\((.*?)\)', block)
-            summary_match = re.search(r'\*\*Summary:\*\* (.*?)(?=\n\*\*|$)', block, re.DOTALL)
-            date = "May 3-5, 2025" # Placeholder date
+            headline_match = HEADLINE_RE.search(block)
+            summary_match = SUMMARY_RE.search(block)
 
             if headline_match:
                 headline_text = headline_match.group(1).strip()
                 headline_url = headline_match.group(2).strip()
                 summary = summary_match.group(1).strip() if summary_match else "No summary available."
+                # Summaries cite their source date, e.g. "From CNN (May 7, 2025): ..."
+                event_date = parse_source_date(summary)
                 
-                events.append({
+                yield {
                     "headline": headline_text,
                     "url": headline_url,
                     "summary": summary,
-                    "date": date
-                })
+                    "date": format_source_date(event_date) if event_date else UNKNOWN_DATE,
+                    "iso_date": event_date.isoformat() if event_date else None
+                }
 
+def process_current_events(input_file, output_file):
+    """Processes the markdown current events file into JSON, extracting links."""
+    try:
+        result = emit_sections([("events", iter_current_events(input_file))], output_file)
     except FileNotFoundError:
         print(f"Error: Input file {input_file} not found.")
         return None
@@ -43,32 +93,41 @@ def process_current_events(input_file, output_file):
         print(f"Error processing {input_file}: {e}")
         return None
 
-    print(f"Successfully processed {len(events)} current events")
-    return {"events": events} 
+    print(f"Successfully processed {section_size(result['events'])} current events")
+    return result
 
-def process_movies_final_v13(input_file, output_file):
-    """Processes the markdown movie data file into JSON using string methods (v13 - Final)."""
-    movies = []
-    source_info = "Unknown Date"
-    current_movie = None
-    print("--- Starting Movie Processing (Final v13) ---")
+def _finish_movie(movie):
+    movie["summary"] = movie["summary"].strip()
+    if not movie["summary"]:
+         movie["summary"] = "No summary available."
+    # Summaries carry the release date, e.g. "Release Date: May 2, 2025."
+    release_date = parse_source_date(movie["summary"])
+    movie["iso_date"] = release_date.isoformat() if release_date else None
+    return movie
 
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+def iter_movies(input_file, meta=None):
+    """Streams movies from the markdown movie data file line by line (v13 rules).
+
+    The "# Top Movies (...)" header is stored in meta["source_info"] when seen.
+    Movies are yielded in file order; callers sort by rank if they need to.
+    """
+    meta = meta if meta is not None else {}
+    meta.setdefault("source_info", "Unknown Date")
+    current_movie = None
 
-        for line_num, line in enumerate(lines):
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for line in f:
             line = line.strip()
 
             if not line:
                 if current_movie:
-                    movies.append(current_movie)
+                    yield _finish_movie(current_movie)
                     current_movie = None
                 continue
 
             if line.startswith("# Top Movies"):
-                match = re.search(r'\((.*?)\)', line)
-                if match: source_info = match.group(1).strip()
+                match = PAREN_RE.search(line)
+                if match: meta["source_info"] = match.group(1).strip()
                 continue
             if line.startswith("Source:"):
                 continue
@@ -89,7 +148,7 @@ def process_movies_final_v13(input_file, output_file):
                         is_title = True
                         
                         if current_movie: # Save previous movie
-                            movies.append(current_movie)
+                            yield _finish_movie(current_movie)
                         
                         current_movie = {
                             "rank": rank,
@@ -121,19 +180,43 @@ def process_movies_final_v13(input_file, output_file):
             # it might indicate the end of the previous movie block if one was active.
             elif not is_title:
                 if current_movie:
-                    movies.append(current_movie)
+                    yield _finish_movie(current_movie)
                     current_movie = None
 
-        # Append the last movie after loop finishes
-        if current_movie:
-            movies.append(current_movie)
-            
-        # Clean up summaries
-        for movie in movies:
-            movie["summary"] = movie["summary"].strip()
-            if not movie["summary"]:
-                 movie["summary"] = "No summary available."
+    # Yield the last movie after loop finishes
+    if current_movie:
+        yield _finish_movie(current_movie)
+
+def _movie_rank(movie):
+    return movie.get('rank', float('inf'))
+
+def iter_movies_by_rank(input_file, meta=None):
+    """Streams movies in rank order.
+
+    Source files list movies by rank already, which a first pass checks
+    without keeping anything; the second pass then streams them. Files out of
+    order are sorted in memory instead.
+    """
+    previous = float('-inf')
+    for movie in iter_movies(input_file):
+        if _movie_rank(movie) < previous:
+            yield from sorted(iter_movies(input_file, meta), key=_movie_rank)
+            return
+        previous = _movie_rank(movie)
+    yield from iter_movies(input_file, meta)
+
+def _movie_sections(input_file):
+    meta = {}
+    yield "movies", iter_movies_by_rank(input_file, meta)
+    # Set once the movies above have been read
+    yield "movie_source_info", meta.get("source_info", "Unknown Date")
+
+def process_movies_final_v13(input_file, output_file):
+    """Processes the markdown movie data file into JSON using string methods (v13 - Final)."""
+    print("--- Starting Movie Processing (Final v13) ---")
 
+    try:
+        result = emit_sections(_movie_sections(input_file), output_file)
     except FileNotFoundError:
         print(f"Error: Input file {input_file} not found.")
         return None
@@ -141,19 +224,27 @@ def process_movies_final_v13(input_file, output_file):
         print(f"Error processing {input_file}: {e}")
         return None
 
-    movies.sort(key=lambda x: x.get('rank', float('inf')))
     print(f"--- Finished Movie Processing (Final v13) ---")
-    print(f"Successfully processed {len(movies)} movies (final string methods v13)")
-    return {"movies": movies, "movie_source_info": source_info}
+    print(f"Successfully processed {section_size(result['movies'])} movies (final string methods v13)")
+    return result
+
+def iter_simple_lines(input_file):
+    """Streams the non-blank lines of a simple list file, skipping a leading '#' header."""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        first = True
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if first and line.startswith("#"):
+                first = False
+                continue
+            first = False
+            yield line
 
 def process_simple_data(input_file, output_file, section_key):
-    data_list = []
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f if line.strip()]
-            if lines and lines[0].startswith("#"):
-                lines = lines[1:]
-            data_list = lines 
+        result = emit_sections([(section_key, iter_simple_lines(input_file))], output_file)
     except FileNotFoundError:
         print(f"Warning: Input file {input_file} not found. Skipping.")
         return None
@@ -161,49 +252,355 @@ def process_simple_data(input_file, output_file, section_key):
         print(f"Error processing {input_file}: {e}")
         return None
 
-    print(f"Successfully processed {len(data_list)} items for {section_key}")
-    return {section_key: data_list}
+    print(f"Successfully processed {section_size(result[section_key])} items for {section_key}")
+    return result
 
-if __name__ == "__main__":
-    static_dir = "src/static"
-    os.makedirs(static_dir, exist_ok=True)
-    
-    combined_data = {}
+DEFAULT_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "static")
+# The manifest and spill files; kept out of the static folder so they are not served
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", ".refresh_cache")
+MANIFEST_FILENAME = "trivia_data.manifest.json"
+# Each source's parsed sections, one JSON value per line (see write_spill)
+SPILL_DIRNAME = "spill"
+# Memory-mapped by the app instead of parsing trivia_data.json (see src/snapshot.py)
+SNAPSHOT_FILENAME = "trivia_data.bin"
+# Bump whenever a processor's output format changes so cached results are re-parsed
+MANIFEST_VERSION = 4
+
+def file_hash(path):
+    """Returns the sha256 hex digest of a file's contents, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
 
-    events_data = process_current_events(os.path.join(static_dir, "current_events.txt"), os.path.join(static_dir, "current_events.json"))
-    if events_data: combined_data.update(events_data)
+@contextmanager
+def atomic_open(path, mode='w'):
+    """Opens a temp file next to path for writing and renames it over path on success."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-",
+                                    suffix=os.path.splitext(path)[1])
+    try:
+        # newline='' keeps the bytes on disk identical to what was written, so
+        # hashes taken while writing match the file on every platform
+        with (os.fdopen(fd, mode) if 'b' in mode else os.fdopen(fd, mode, encoding='utf-8', newline='')) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644) # mkstemp creates files as 0600
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-    # --- Process Movies (Step 018 - Final v13) ---
-    movies_data = process_movies_final_v13(os.path.join(static_dir, "movie_data.txt"), os.path.join(static_dir, "movie_data.json"))
-    if movies_data: combined_data.update(movies_data)
-    # ---------------------------------------------
+def write_json_atomic(path, data, indent=None):
+    """Writes JSON to a temp file in the same directory, then renames it over path."""
+    with atomic_open(path) as f:
+        json.dump(data, f, indent=indent)
 
-    music_data = process_simple_data(os.path.join(static_dir, "music_data.txt"), os.path.join(static_dir, "music_data.json"), "music")
-    if music_data: combined_data.update(music_data)
+def _indent_lines(text, prefix):
+    return text.replace('\n', '\n' + prefix)
 
-    sports_data = process_simple_data(os.path.join(static_dir, "sports_news.txt"), os.path.join(static_dir, "sports_news.json"), "sports")
-    if sports_data: combined_data.update(sports_data)
+def _is_scalar(value):
+    return isinstance(value, (str, bytes, dict)) or not hasattr(value, '__iter__')
 
-    hockey_data = process_simple_data(os.path.join(static_dir, "hockey_news.txt"), os.path.join(static_dir, "hockey_news.json"), "hockey_news")
-    if hockey_data: combined_data.update(hockey_data)
+def write_json_stream(f, sections, indent=2):
+    """Writes a JSON object section by section, streaming list values record by record.
 
-    baseball_data = process_simple_data(os.path.join(static_dir, "baseball_news.txt"), os.path.join(static_dir, "baseball_news.json"), "baseball_news")
-    if baseball_data: combined_data.update(baseball_data)
+    sections is an iterable of (key, value) pairs. A value that is a list or an
+    iterator (e.g. one of the iter_* parsers) is written one record at a time,
+    so only the current record is ever encoded in memory. The bytes match
+    json.dump(dict(sections), f, indent=indent).
+    """
+    pad = ' ' * indent
+    f.write('{')
+    first_section = True
+    for key, value in sections:
+        f.write(('\n' if first_section else ',\n') + pad + json.dumps(key) + ': ')
+        first_section = False
+        if _is_scalar(value):
+            f.write(_indent_lines(json.dumps(value, indent=indent), pad))
+            continue
+        f.write('[')
+        empty = True
+        for record in value:
+            f.write(('\n' if empty else ',\n') + pad * 2 + _indent_lines(json.dumps(record, indent=indent), pad * 2))
+            empty = False
+        f.write(']' if empty else '\n' + pad + ']')
+    f.write('}' if first_section else '\n}')
 
-    tennis_data = process_simple_data(os.path.join(static_dir, "tennis_news.txt"), os.path.join(static_dir, "tennis_news.json"), "tennis_news")
-    if tennis_data: combined_data.update(tennis_data)
+def write_spill(path, sections):
+    """Streams sections to a spill file and returns {key: record count, or None for a single value}.
 
-    golf_data = process_simple_data(os.path.join(static_dir, "golf_news.txt"), os.path.join(static_dir, "golf_news.json"), "golf_news")
-    if golf_data: combined_data.update(golf_data)
+    A list section is a line "L<key as JSON>" followed by one line per record;
+    a single value is one line "S<[key, value] as JSON>". JSON text never
+    starts with L or S, and json.dumps() escapes newlines, so every line is
+    unambiguous.
+    """
+    summary = {}
+    with atomic_open(path) as f:
+        for key, value in sections:
+            if _is_scalar(value):
+                f.write('S' + json.dumps([key, value]) + '\n')
+                summary[key] = None
+                continue
+            f.write('L' + json.dumps(key) + '\n')
+            count = 0
+            for record in value:
+                f.write(json.dumps(record) + '\n')
+                count += 1
+            summary[key] = count
+    return summary
 
-    tv_show_data = process_simple_data(os.path.join(static_dir, "tv_show_data.txt"), os.path.join(static_dir, "tv_show_data.json"), "tv_shows")
-    if tv_show_data: combined_data.update(tv_show_data)
-        
-    combined_output_file = os.path.join(static_dir, "trivia_data.json")
+class _SpillRecords:
+    """Iterates one list section of an open spill file; keeps the line that ended it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.next_line = ''
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.f is None:
+            raise StopIteration
+        line = self.f.readline()
+        if not line or line[0] in 'LS':
+            self.next_line, self.f = line, None
+            raise StopIteration
+        return json.loads(line)
+
+def read_spill(path):
+    """Yields a spill file's (key, value) pairs; list values are iterators reading records as they are consumed."""
+    with open(path, 'r', encoding='utf-8') as f:
+        line = f.readline()
+        while line:
+            if line[0] == 'S':
+                key, value = json.loads(line[1:])
+                yield key, value
+                line = f.readline()
+            elif line[0] == 'L':
+                records = _SpillRecords(f)
+                yield json.loads(line[1:]), records
+                for _ in records:  # Skips whatever the caller left unread
+                    pass
+                line = records.next_line
+            else:
+                raise ValueError(f"Malformed spill file {path}")
+
+def emit_sections(sections, output_file):
+    """Processor output: spills sections to output_file and returns its summary, or returns them as a dict without one."""
+    if output_file is None:
+        return {key: value if _is_scalar(value) else list(value) for key, value in sections}
+    return write_spill(output_file, sections)
+
+def section_size(value):
+    """Record count of a processor result's section, whether spilled (a count) or returned (a list)."""
+    return value if isinstance(value, int) else len(value)
+
+class _HashingWriter:
+    """Passes text through to a file and hashes it, giving the file's DataStore version without re-reading it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.hasher = VersionHasher()
+
+    def write(self, text):
+        self.hasher.update(text.encode('utf-8'))
+        return self.f.write(text)
+
+def write_snapshot(path, sections, source_version):
+    """Writes the binary snapshot; failures are reported, since the JSON file still serves."""
+    try:
+        with atomic_open(path, 'wb') as f:
+            dump_snapshot(f, sections, source_version)
+    except (OSError, ValueError) as e:  # ValueError covers SnapshotError and bad spill lines
+        print(f"Error writing binary snapshot {path}: {e}")
+        return False
+    print(f"Wrote binary snapshot {path} ({os.path.getsize(path)} bytes)")
+    return True
+
+def snapshot_is_current(snapshot_file, json_file):
+    """True if snapshot_file exists and was built from json_file's current content."""
+    try:
+        return BinarySnapshot(snapshot_file).source_version == file_version(json_file)
+    except (OSError, SnapshotError):
+        return False
+
+def load_manifest(path):
     try:
-        with open(combined_output_file, 'w', encoding='utf-8') as f:
-            json.dump(combined_data, f, indent=2)
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": MANIFEST_VERSION, "sources": {}}
+
+# --- Source registry ---
+# Each entry maps a source name to its input file and processor. Processors are
+# called as processor(input_file, output_file), stream their sections to the
+# spill file output_file (see emit_sections) and return its summary, or None on
+# failure. Sections are merged in registration order.
+SOURCE_REGISTRY = []
+
+def register_source(name, filename, processor):
+    """Adds a source to the refresh pipeline; this is all a new category needs."""
+    SOURCE_REGISTRY.append((name, filename, processor))
+
+register_source("events", "current_events.txt", process_current_events)
+register_source("movies", "movie_data.txt", process_movies_final_v13)
+register_source("music", "music_data.txt", partial(process_simple_data, section_key="music"))
+register_source("sports", "sports_news.txt", partial(process_simple_data, section_key="sports"))
+register_source("hockey_news", "hockey_news.txt", partial(process_simple_data, section_key="hockey_news"))
+register_source("baseball_news", "baseball_news.txt", partial(process_simple_data, section_key="baseball_news"))
+register_source("tennis_news", "tennis_news.txt", partial(process_simple_data, section_key="tennis_news"))
+register_source("golf_news", "golf_news.txt", partial(process_simple_data, section_key="golf_news"))
+register_source("tv_shows", "tv_show_data.txt", partial(process_simple_data, section_key="tv_shows"))
+
+def _run_processor(processor, input_file, output_file):
+    """Runs one processor and returns (result, seconds); module-level so process pools can pickle it."""
+    started = time.perf_counter()
+    result = processor(input_file, output_file)
+    return result, time.perf_counter() - started
+
+def _combined_sections(registry, sources, spill_dir):
+    """Streams the merged sections from the spill files of the sources in `sources`, in registry order."""
+    seen = set()
+    for name, _, _ in registry:
+        if name not in sources:
+            continue
+        for key, value in read_spill(os.path.join(spill_dir, name + ".jsonl")):
+            if key in seen:
+                print(f"Warning: section {key} from {name} is already defined by an earlier source; skipped")
+                continue
+            seen.add(key)
+            yield key, value
+
+def refresh(static_dir=DEFAULT_STATIC_DIR, executor="thread", max_workers=None, registry=None,
+            cache_dir=DEFAULT_CACHE_DIR):
+    """Rebuilds trivia_data.json and trivia_data.bin from the source files in static_dir and returns a summary.
+
+    Each source is parsed into its own spill file under cache_dir, and the
+    manifest there records the content hash it was parsed from, so only
+    sources that changed since the last run are parsed again. Changed
+    sources are parsed concurrently on a thread pool (or a process pool with
+    executor="process"). Both outputs are then streamed from the spill files
+    in registry order, so no step holds more than a record at a time.
+    """
+    started = time.perf_counter()
+    registry = SOURCE_REGISTRY if registry is None else registry
+    spill_dir = os.path.join(cache_dir, SPILL_DIRNAME)
+    os.makedirs(spill_dir, exist_ok=True)
+    manifest_file = os.path.join(cache_dir, MANIFEST_FILENAME)
+    manifest = load_manifest(manifest_file)
+    sources = {}
+    timings = {}
+    stages = {}
+    parsed, reused = [], []
+
+    stage_started = time.perf_counter()
+    pending = {}
+    for name, filename, processor in registry:
+        input_file = os.path.join(static_dir, filename)
+        spill_file = os.path.join(spill_dir, name + ".jsonl")
+        digest = file_hash(input_file)
+        entry = manifest["sources"].get(name)
+        if digest is not None and entry and entry["hash"] == digest and os.path.exists(spill_file):
+            reused.append(name)
+            sources[name] = entry
+        else:
+            parsed.append(name)
+            pending[name] = (digest, processor, input_file, spill_file)
+    stages["hash"] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    if pending:
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=max_workers or min(len(pending), os.cpu_count() or 1)) as pool:
+            futures = {name: pool.submit(_run_processor, processor, input_file, spill_file)
+                       for name, (_, processor, input_file, spill_file) in pending.items()}
+            for name, future in futures.items():
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    print(f"Error processing source {name}: {e}")
+                    result, seconds = None, 0.0
+                timings[name] = round(seconds, 6)
+                print(f"Processed {name} in {seconds * 1000:.1f} ms")
+                digest = pending[name][0]
+                if result is not None and digest is not None:
+                    sources[name] = {"hash": digest, "sections": result}
+
+    stages["parse"] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    # A failed parse leaves the previous spill behind; it must not be merged
+    for name, _, _ in registry:
+        spill_file = os.path.join(spill_dir, name + ".jsonl")
+        if name not in sources and os.path.exists(spill_file):
+            os.remove(spill_file)
+    combined_output_file = os.path.join(static_dir, "trivia_data.json")
+    # Sources that vanished or failed to parse also change the output
+    changed = bool(parsed) or set(sources) != set(manifest["sources"]) or not os.path.exists(combined_output_file)
+    sections = {}
+    for name, _, _ in registry:
+        for key, count in sources.get(name, {}).get("sections", {}).items():
+            sections.setdefault(key, count)
+    stages["merge"] = time.perf_counter() - stage_started
+
+    snapshot_file = os.path.join(static_dir, SNAPSHOT_FILENAME)
+    stage_started = time.perf_counter()
+    snapshot_seconds = 0.0
+    output_version = manifest.get("output_version")
+    if changed:
+        with atomic_open(combined_output_file) as f:
+            writer = _HashingWriter(f)
+            write_json_stream(writer, _combined_sections(registry, sources, spill_dir), indent=2)
+            output_version = writer.hasher.version()
+            # Renamed into place before the JSON file, so a worker never sees
+            # new JSON next to a snapshot of the old content
+            snapshot_started = time.perf_counter()
+            write_snapshot(snapshot_file, _combined_sections(registry, sources, spill_dir), output_version)
+            snapshot_seconds = time.perf_counter() - snapshot_started
         print(f"Successfully combined data into {combined_output_file}")
-    except Exception as e:
-        print(f"Error writing combined JSON to {combined_output_file}: {e}")
+    else:
+        print(f"No source changes; {combined_output_file} left as is")
+        snapshot_started = time.perf_counter()
+        if not snapshot_is_current(snapshot_file, combined_output_file):
+            json_version = file_version(combined_output_file)
+            if json_version == output_version:
+                write_snapshot(snapshot_file, _combined_sections(registry, sources, spill_dir), json_version)
+            else:
+                # Edited since this script wrote it; built from the file itself so it matches
+                with open(combined_output_file, 'r', encoding='utf-8') as f:
+                    existing = json.load(f)
+                write_snapshot(snapshot_file, existing.items(), json_version)
+        snapshot_seconds = time.perf_counter() - snapshot_started
+    write_json_atomic(manifest_file, {"version": MANIFEST_VERSION, "output_version": output_version,
+                                      "sources": sources})
+    stages["write"] = time.perf_counter() - stage_started - snapshot_seconds
+    stages["snapshot"] = snapshot_seconds
 
+    return {
+        "output_file": combined_output_file,
+        "snapshot_file": snapshot_file,
+        "changed": changed,
+        "parsed": parsed,
+        "reused": reused,
+        "timings": timings,
+        "stages": {stage: round(seconds, 6) for stage, seconds in stages.items()},
+        "total_seconds": round(time.perf_counter() - started, 6),
+        "sections": {key: count for key, count in sections.items() if count is not None},
+    }
+
+if __name__ == "__main__":
+    try:
+        refresh()
+    except Exception as e:
+        print(f"Error refreshing trivia data: {e}")
+        sys.exit(1)
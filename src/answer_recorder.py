@@ -0,0 +1,214 @@
+import atexit
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from src.models.quiz_stats import QuizAnswer, UserCategoryStats
+from src.models.user import User, db
+
+
+class AnswerRecorder:
+    """Write-behind buffer for graded quiz answers.
+
+    `record()` only appends to an in-memory list, so answering stays fast. A
+    daemon thread flushes the list every `flush_interval` seconds, or as soon
+    as it holds `max_batch` answers. Each flush is a single transaction: the
+    answers go into `quiz_answers` with one bulk insert, and the per-user,
+    per-category totals in `user_category_stats` are bumped with one upsert,
+    so stats reads never scan raw answers. Answers still in the buffer are
+    not yet visible in the stats; a flush at exit writes whatever is left.
+    """
+
+    def __init__(self, flush_interval=2.0, max_batch=500, max_pending=10000):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # A failed flush is retried once, holding at most this many answers
+        self.max_pending = max_pending
+        self.enabled = True
+        self._app = None
+        self._buffer = []
+        self._retry = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._known_users = set()
+        self.stats = {"recorded": 0, "flushed": 0, "flushes": 0, "flush_errors": 0, "dropped": 0}
+
+    def init_app(self, app, enabled=True):
+        self._app = app
+        self.enabled = enabled
+        atexit.register(self.flush)
+
+    def user_exists(self, user_id):
+        """Checks a user ID once per process, so flushes never hit a foreign key error."""
+        if user_id in self._known_users:
+            return True
+        if db.session.get(User, user_id) is None:
+            return False
+        self._known_users.add(user_id)
+        return True
+
+    def forget_user(self, user_id):
+        """Drops a deleted user's buffered answers. Waits for a flush in progress, so none is written after this."""
+        with self._flush_lock:
+            with self._lock:
+                self._known_users.discard(user_id)
+                self._buffer = [row for row in self._buffer if row["user_id"] != user_id]
+                self._retry = [row for row in self._retry if row["user_id"] != user_id]
+
+    def record(self, user_id, question_id, category, correct):
+        with self._lock:
+            self._buffer.append({
+                "user_id": user_id,
+                "question_id": str(question_id),
+                "category": category or "Uncategorized",
+                "correct": bool(correct),
+                "answered_at": datetime.utcnow(),
+            })
+            self.stats["recorded"] += 1
+            full = len(self._buffer) >= self.max_batch
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def pending(self):
+        return len(self._buffer) + len(self._retry)
+
+    def flush(self):
+        """Writes every buffered answer now. Returns how many were written."""
+        if self._app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+                retry, self._retry = self._retry, []
+            written = 0
+            with self._app.app_context():
+                # A batch that failed before goes in its own transaction, so
+                # one bad row cannot keep failing every later batch
+                if retry:
+                    written += self._write(retry, retried=True)
+                if rows:
+                    written += self._write(rows)
+            return written
+
+    def _without_deleted_users(self, rows):
+        """Drops answers from users that no longer exist.
+
+        Another worker may have deleted the user, and forget_user() only
+        clears the buffer of the worker that handled the delete.
+        """
+        user_ids = {row["user_id"] for row in rows}
+        existing = set(db.session.scalars(select(User.id).where(User.id.in_(user_ids))))
+        if existing == user_ids:
+            return rows
+        self._known_users -= user_ids - existing
+        kept = [row for row in rows if row["user_id"] in existing]
+        self.stats["dropped"] += len(rows) - len(kept)
+        print(f"Dropped {len(rows) - len(kept)} quiz answers from deleted users")
+        return kept
+
+    def _write(self, rows, retried=False):
+        try:
+            for attempt in range(2):
+                rows = self._without_deleted_users(rows)
+                if not rows:
+                    return 0
+                try:
+                    db.session.execute(insert(QuizAnswer), rows)
+                    _upsert_stats(_aggregate(rows))
+                    db.session.commit()
+                    break
+                except IntegrityError:
+                    # A user was deleted between the check and the insert;
+                    # check again rather than failing everyone's answers
+                    db.session.rollback()
+                    if attempt:
+                        raise
+        except Exception as e:
+            db.session.rollback()
+            self.stats["flush_errors"] += 1
+            print(f"Error flushing {len(rows)} quiz answers: {e}")
+            dropped = len(rows) if retried else max(0, len(rows) - self.max_pending)
+            if not retried:
+                self._retry = rows[-self.max_pending:]
+            if dropped:
+                self.stats["dropped"] += dropped
+                print(f"Dropped {dropped} quiz answers after failed flushes")
+            return 0
+        self.stats["flushes"] += 1
+        self.stats["flushed"] += len(rows)
+        return len(rows)
+
+    def _ensure_thread(self):
+        if not self.enabled or self._app is None:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="answer-recorder", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            # record() sets the event early once a full batch is waiting
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def _aggregate(rows):
+    totals = defaultdict(lambda: {"answered": 0, "correct": 0, "last_answered_at": None})
+    for row in rows:
+        entry = totals[(row["user_id"], row["category"])]
+        entry["answered"] += 1
+        entry["correct"] += row["correct"]
+        if entry["last_answered_at"] is None or row["answered_at"] > entry["last_answered_at"]:
+            entry["last_answered_at"] = row["answered_at"]
+    return [{"user_id": user_id, "category": category, **entry} for (user_id, category), entry in totals.items()]
+
+
+def _upsert_stats(totals):
+    """Adds the flushed totals to user_category_stats in one statement where the backend allows it."""
+    if not totals:
+        return
+    table = UserCategoryStats.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=["user_id", "category"], set_={
+            "answered": table.c.answered + stmt.excluded.answered,
+            "correct": table.c.correct + stmt.excluded.correct,
+            "last_answered_at": stmt.excluded.last_answered_at,
+        })
+        db.session.execute(stmt, totals)
+    elif dialect == "mysql":
+        stmt = mysql.insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            answered=table.c.answered + stmt.inserted.answered,
+            correct=table.c.correct + stmt.inserted.correct,
+            last_answered_at=stmt.inserted.last_answered_at,
+        )
+        db.session.execute(stmt, totals)
+    else:
+        # Portable fallback: read the affected rows once, then bulk update and insert
+        users = {t["user_id"] for t in totals}
+        existing = {(s.user_id, s.category): s for s in
+                    UserCategoryStats.query.filter(UserCategoryStats.user_id.in_(users))}
+        updates, inserts = [], []
+        for t in totals:
+            row = existing.get((t["user_id"], t["category"]))
+            if row is None:
+                inserts.append(t)
+            else:
+                updates.append({"id": row.id, "answered": row.answered + t["answered"],
+                                "correct": row.correct + t["correct"], "last_answered_at": t["last_answered_at"]})
+        if updates:
+            db.session.execute(update(UserCategoryStats), updates)
+        if inserts:
+            db.session.execute(insert(UserCategoryStats), inserts)
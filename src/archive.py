@@ -0,0 +1,79 @@
+import hashlib
+import json
+from datetime import date, datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.archive import ArchiveItem, ArchiveSnapshot
+from src.models.user import db
+from src.snapshot import is_section
+
+
+def _item_hash(item):
+    return hashlib.sha1(json.dumps(item, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _item_date(item, fallback):
+    # Items parsed by process_data.py carry an iso_date; plain list entries
+    # (music, TV, sports lines) are dated by the snapshot that first saw them.
+    if isinstance(item, dict) and item.get('iso_date'):
+        try:
+            return date.fromisoformat(item['iso_date'])
+        except ValueError:
+            pass
+    return fallback
+
+
+def record_snapshot(data, version):
+    """Archives every list section of `data` under snapshot `version`.
+
+    Items already in the archive are not stored again; only their
+    last_snapshot_id moves forward. Recording a version twice is a no-op.
+    Returns the snapshot, or None if there was nothing to record.
+    """
+    if not version or not data:
+        return None
+    snapshot = ArchiveSnapshot.query.filter_by(version=version).first()
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = ArchiveSnapshot(version=version, created_at=datetime.utcnow())
+    db.session.add(snapshot)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # Another worker archived the same version first
+        db.session.rollback()
+        return ArchiveSnapshot.query.filter_by(version=version).first()
+
+    today = snapshot.created_at.date()
+    count = 0
+    for section, items in data.items():
+        if not is_section(items):
+            continue
+        hashes = {_item_hash(item): item for item in items}
+        existing = {row.item_hash: row for row in ArchiveItem.query.filter(
+            ArchiveItem.section == section, ArchiveItem.item_hash.in_(list(hashes)))}
+        for item_hash, item in hashes.items():
+            row = existing.get(item_hash)
+            if row is not None:
+                row.last_snapshot_id = snapshot.id
+                continue
+            db.session.add(ArchiveItem(
+                section=section,
+                item_hash=item_hash,
+                item_date=_item_date(item, today),
+                first_snapshot_id=snapshot.id,
+                last_snapshot_id=snapshot.id,
+                payload=json.dumps(item),
+            ))
+        count += len(hashes)
+
+    snapshot.item_count = count
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return ArchiveSnapshot.query.filter_by(version=version).first()
+    print(f"Archived snapshot {version} ({count} items)")
+    return snapshot
@@ -0,0 +1,272 @@
+"""ASGI entry point: the Flask app with non-blocking OpenTDB calls.
+
+Under sync workers every request that waits on OpenTDB (up to the client
+timeout, plus up to 6 seconds for the rate limiter) holds a whole worker, so a
+few slow upstream calls can starve the front page. Here the Flask app runs in
+a thread pool behind an event loop, and the two OpenTDB-bound routes do their
+upstream wait first with an async client:
+
+* /api/get_trivia_categories warms the shared category cache,
+* /api/fetch_quiz_questions makes the live fetch a cold bucket needs,
+
+before handing the request to the unchanged Flask view, which then finds the
+response already there (see opentdb.prefetched_responses). Quiz room event
+streams and answers (/api/rooms/<id>/events and /answer) are served on the
+event loop itself, so hundreds of listeners cost a coroutine each rather than
+a thread, and a room answering at once does not queue for the pool. Every
+other route goes straight to the thread pool.
+
+Run with:
+    uvicorn src.asgi:app --port 5000
+    gunicorn -k uvicorn_worker.UvicornWorker -w 2 src.asgi:app
+"""
+import asyncio
+import contextvars
+import json
+import os
+import re
+import sys
+from tempfile import SpooledTemporaryFile
+from urllib.parse import parse_qsl
+
+from asgiref.sync import sync_to_async
+from werkzeug.datastructures import MultiDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import (app as flask_app, opentdb, question_bank, quiz_rooms, parse_quiz_args,
+                      GEO_QUIZ_CATEGORY, OPENTDB_MAX_AMOUNT)
+from src.opentdb import AsyncOpenTDBClient, prefetched_responses, question_params, _request_key
+from src.quiz_rooms import SSE_HEADERS, AsyncSubscriber, handle_answer
+
+ROOM_PATH = re.compile(r"^/api/rooms/([A-Za-z0-9_-]+)/(events|answer)$")
+# Answer bodies are a few dozen bytes; anything far larger is not one
+MAX_ANSWER_BODY = 4096
+
+
+def _wsgi_environ(scope, body):
+    script_name = scope.get("root_path", "").encode("utf-8").decode("latin-1")
+    path_info = scope["path"].encode("utf-8").decode("latin-1")
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ("CONTENT_LENGTH", "CONTENT_TYPE") else "HTTP_" + name
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class _ThreadPoolWsgiToAsgi:
+    """Runs a WSGI app for ASGI servers, one request per thread of the loop's default executor.
+
+    asgiref's WsgiToAsgi runs every request in one shared thread, which
+    would serialize them; Flask is thread-safe, so requests run concurrently
+    here. Response chunks are sent back through the loop as they are produced.
+    """
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    async def __call__(self, scope, receive, send):
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            loop = asyncio.get_running_loop()
+
+            def sync_send(message):
+                asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+            # Run in a copy of this context, so the view sees prefetched_responses
+            context = contextvars.copy_context()
+            await loop.run_in_executor(None, context.run, self._run, scope, body, sync_send)
+
+    def _run(self, scope, body, sync_send):
+        response = {"start": None, "sent": False}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response["sent"]:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["start"] = {"type": "http.response.start", "status": int(status.split(" ", 1)[0]),
+                                 "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]}
+
+        def send_start():
+            if not response["sent"]:
+                sync_send(response["start"])
+                response["sent"] = True
+
+        result = self.wsgi_application(_wsgi_environ(scope, body), start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    send_start()
+                    sync_send({"type": "http.response.body", "body": chunk, "more_body": True})
+            send_start()
+            sync_send({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+def _bucket_count(category, difficulty, q_type):
+    with flask_app.app_context():
+        return question_bank.count(category, difficulty, q_type)
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _read_body(receive, limit):
+    """Returns the request body, or None if it exceeds `limit` bytes or the client disconnected."""
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > limit:
+            return None
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status, data):
+    body = json.dumps(data).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class TriviaASGI:
+    def __init__(self, wsgi_app, client, rooms):
+        self.wsgi = _ThreadPoolWsgiToAsgi(wsgi_app)
+        self.opentdb = AsyncOpenTDBClient(client)
+        self.rooms = rooms
+        self.prefetchers = {
+            "/api/get_trivia_categories": self._prefetch_categories,
+            "/api/fetch_quiz_questions": self._prefetch_quiz_questions,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        match = ROOM_PATH.match(scope.get("path", "")) if scope["type"] == "http" else None
+        if match and match.group(2) == "events" and scope.get("method") == "GET":
+            return await self._room_events(match.group(1), receive, send)
+        if match and match.group(2) == "answer" and scope.get("method") == "POST":
+            return await self._room_answer(match.group(1), receive, send)
+        prefetch = self.prefetchers.get(scope.get("path")) if scope["type"] == "http" else None
+        if prefetch is not None and scope.get("method") == "GET":
+            responses = {}
+            args = MultiDict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+            await prefetch(args, responses)
+            # Copied into the worker thread along with the rest of the context
+            prefetched_responses.set(responses)
+        await self.wsgi(scope, receive, send)
+
+    async def _prefetch_categories(self, args, responses):
+        try:
+            await self.opentdb.get_categories()
+        except Exception as e:
+            # Let the view report the failure instead of retrying with a blocking call
+            responses[_request_key("/api_category.php", {})] = e
+
+    async def _prefetch_quiz_questions(self, args, responses):
+        await self._prefetch_categories(args, responses)  # The view checks the category against them
+        try:
+            amount, category_id, category, difficulty, q_type = parse_quiz_args(args)
+        except ValueError:
+            return  # The view rejects these
+        if category_id == GEO_QUIZ_CATEGORY:
+            return
+        have = await sync_to_async(_bucket_count, thread_sensitive=False)(category, difficulty, q_type)
+        if not question_bank.should_top_up(have, amount, category, difficulty, q_type):
+            return  # The view will serve this from the local bank
+        live_amount = min(amount, OPENTDB_MAX_AMOUNT)
+        key = _request_key("/api.php", question_params(live_amount, category, difficulty, q_type))
+        try:
+            responses[key] = await self.opentdb.fetch_questions(
+                live_amount, category=category, difficulty=difficulty, q_type=q_type)
+        except Exception as e:
+            responses[key] = e
+
+    async def _room_events(self, room_id, receive, send):
+        room = self.rooms.get(room_id)
+        if room is None:
+            return await _send_json(send, 404, {"success": False, "error": "Room not found."})
+
+        subscriber = AsyncSubscriber(asyncio.get_running_loop(), room.queue_size)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in SSE_HEADERS.items()]})
+        room.subscribe(subscriber)
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        disconnected.add_done_callback(lambda _: subscriber.close())
+        try:
+            while True:
+                payload = await subscriber.next_event()
+                if payload is None:
+                    break
+                # Waits while the client's socket buffer is full; events that
+                # arrive meanwhile fill this subscriber's queue, not memory
+                await send({"type": "http.response.body", "body": payload, "more_body": True})
+            if not disconnected.done():
+                await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            pass  # The client went away mid-send
+        finally:
+            room.unsubscribe(subscriber)
+            disconnected.cancel()
+
+    async def _room_answer(self, room_id, receive, send):
+        room = self.rooms.get(room_id)
+        if room is None:
+            return await _send_json(send, 404, {"success": False, "error": "Room not found."})
+        body = await _read_body(receive, MAX_ANSWER_BODY)
+        if body is None:
+            return await _send_json(send, 413, {"success": False, "error": "Request body too large."})
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            data = None
+        status, response = handle_answer(room, data)
+        await _send_json(send, status, response)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.opentdb.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = TriviaASGI(flask_app, opentdb, quiz_rooms)
@@ -0,0 +1,41 @@
+import mimetypes
+
+# Older mimetypes tables lack these, and send_from_directory relies on them
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/svg+xml", ".svg")
+
+ASSET_URL_PREFIX = "/"
+# Quiz images never render wider than the quiz panel
+DEFAULT_SIZES = "(max-width: 640px) 100vw, 640px"
+
+
+def asset_url(src):
+    """Maps a manifest path such as assets/x.1a2b3c4d5e.jpg to its URL."""
+    return ASSET_URL_PREFIX + src
+
+
+def resolve_image(manifest, path):
+    """Looks up an original image path (as used in geo_quiz_data.json) in the asset manifest.
+
+    Returns the fingerprinted fallback URL, its intrinsic size and one srcset
+    per modern format (AVIF first), or None if the image has not been built.
+    Callers fall back to the original static path in that case.
+    """
+    entry = manifest.get(path) if path else None
+    if not entry:
+        return None
+    sources = []
+    for content_type in ("image/avif", "image/webp"):
+        variants = entry.get("variants", {}).get(content_type)
+        if variants:
+            srcset = ", ".join(f"{asset_url(v['src'])} {v['width']}w" for v in variants)
+            sources.append({"type": content_type, "srcset": srcset})
+    return {
+        "src": asset_url(entry["src"]),
+        "content_type": entry.get("content_type"),
+        "width": entry.get("width"),
+        "height": entry.get("height"),
+        "sources": sources,
+        "sizes": DEFAULT_SIZES,
+    }
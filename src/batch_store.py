@@ -0,0 +1,198 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Only needed for redis:// batch stores
+    redis = None
+
+
+def new_batch_id():
+    return secrets.token_urlsafe(9)
+
+
+class BatchStore(ABC):
+    """Server-side store for quiz batches, keyed by a short batch ID.
+
+    Batches are shuffled once before they are stored, so the session only
+    needs the batch ID and an integer cursor; `get_item` fetches the question
+    at that position without loading the rest of the batch. Batches expire
+    after `ttl` seconds.
+    """
+
+    def __init__(self, ttl=2 * 3600):
+        self.ttl = ttl
+
+    def put(self, questions):
+        """Stores `questions` in the given order and returns the new batch ID."""
+        batch_id = new_batch_id()
+        self._put(batch_id, [json.dumps(q, separators=(",", ":")) for q in questions])
+        return batch_id
+
+    def get_item(self, batch_id, index):
+        """Returns question `index` of the batch, or None if out of range, unknown or expired."""
+        if not batch_id or index < 0:
+            return None
+        payload = self._get_item(batch_id, index)
+        return json.loads(payload) if payload is not None else None
+
+    def get(self, batch_id):
+        """Returns the whole batch, or None if it is unknown or expired."""
+        if not batch_id:
+            return None
+        payloads = self._get_all(batch_id)
+        return [json.loads(p) for p in payloads] if payloads else None
+
+    @abstractmethod
+    def delete(self, batch_id):
+        """Removes the batch; unknown IDs are ignored."""
+
+    @abstractmethod
+    def _put(self, batch_id, payloads):
+        """Stores the serialized questions under batch_id, expiring after `ttl`."""
+
+    @abstractmethod
+    def _get_item(self, batch_id, index):
+        """Returns serialized question `index`, or None."""
+
+    @abstractmethod
+    def _get_all(self, batch_id):
+        """Returns every serialized question of the batch, or None."""
+
+
+class MemoryBatchStore(BatchStore):
+    """In-process LRU. Fast, but batches are only visible to the worker that made them."""
+
+    def __init__(self, ttl=2 * 3600, max_entries=1000):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _put(self, batch_id, payloads):
+        with self._lock:
+            self._entries[batch_id] = (time.monotonic() + self.ttl, payloads)
+            self._entries.move_to_end(batch_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_all(self, batch_id):
+        with self._lock:
+            entry = self._entries.get(batch_id)
+            if entry is None:
+                return None
+            expires_at, payloads = entry
+            if expires_at < time.monotonic():
+                del self._entries[batch_id]
+                return None
+            self._entries.move_to_end(batch_id)
+            return payloads
+
+    def _get_item(self, batch_id, index):
+        payloads = self._get_all(batch_id)
+        if payloads is None or index >= len(payloads):
+            return None
+        return payloads[index]
+
+    def delete(self, batch_id):
+        with self._lock:
+            self._entries.pop(batch_id, None)
+
+
+class SQLiteBatchStore(BatchStore):
+    """SQLite file shared by all workers on the host; one row per question."""
+
+    def __init__(self, path, ttl=2 * 3600, purge_every=500):
+        super().__init__(ttl)
+        self.path = path
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS quiz_batch_items ("
+                         "batch_id TEXT NOT NULL, idx INTEGER NOT NULL, payload TEXT NOT NULL, "
+                         "expires_at REAL NOT NULL, PRIMARY KEY (batch_id, idx))")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_quiz_batch_items_expires ON quiz_batch_items (expires_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _put(self, batch_id, payloads):
+        expires_at = time.time() + self.ttl
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO quiz_batch_items (batch_id, idx, payload, expires_at) "
+                             "VALUES (?, ?, ?, ?)",
+                             [(batch_id, i, p, expires_at) for i, p in enumerate(payloads)])
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                conn.execute("DELETE FROM quiz_batch_items WHERE expires_at < ?", (time.time(),))
+
+    def _get_item(self, batch_id, index):
+        row = self._connect().execute(
+            "SELECT payload FROM quiz_batch_items WHERE batch_id = ? AND idx = ? AND expires_at >= ?",
+            (batch_id, index, time.time())).fetchone()
+        return row[0] if row else None
+
+    def _get_all(self, batch_id):
+        rows = self._connect().execute(
+            "SELECT payload FROM quiz_batch_items WHERE batch_id = ? AND expires_at >= ? ORDER BY idx",
+            (batch_id, time.time())).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, batch_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM quiz_batch_items WHERE batch_id = ?", (batch_id,))
+
+
+class RedisBatchStore(BatchStore):
+    """Redis (or any Redis-protocol server); each batch is a list, expiry is left to Redis."""
+
+    def __init__(self, url, ttl=2 * 3600, prefix="quiz_batch:"):
+        if redis is None:
+            raise RuntimeError("The redis package is required for redis:// batch stores")
+        super().__init__(ttl)
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+
+    def _put(self, batch_id, payloads):
+        key = self.prefix + batch_id
+        pipe = self.client.pipeline()
+        pipe.rpush(key, *payloads)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def _get_item(self, batch_id, index):
+        payload = self.client.lindex(self.prefix + batch_id, index)
+        return payload.decode("utf-8") if payload is not None else None
+
+    def _get_all(self, batch_id):
+        return [p.decode("utf-8") for p in self.client.lrange(self.prefix + batch_id, 0, -1)]
+
+    def delete(self, batch_id):
+        self.client.delete(self.prefix + batch_id)
+
+
+def create_batch_store(url, ttl=2 * 3600):
+    """Builds a store from a URL: memory://, sqlite:///path/to/file.db or redis://host:port/db."""
+    if url.startswith("memory://"):
+        return MemoryBatchStore(ttl=ttl)
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteBatchStore(path, ttl=ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBatchStore(url, ttl=ttl)
+    raise ValueError(f"Unsupported batch store URL: {url}")
@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+
+from src.metrics import DATA_LOAD_SECONDS
+from src.snapshot import BinarySnapshot, SnapshotError, content_version, file_version
+
+
+class DataSnapshot:
+    """An immutable view of the trivia data file.
+
+    `data` is the parsed JSON, or a BinarySnapshot whose list sections decode
+    records on access; `format` says which.
+    """
+
+    def __init__(self, data, version, mtime, loaded_at, format="json"):
+        self.data = data
+        self.version = version
+        self.mtime = mtime
+        self.loaded_at = loaded_at
+        self.format = format
+
+
+class DataStore:
+    """Process-wide cache of a JSON data file with hot reload.
+
+    The file is parsed once and served from memory. Every `check_interval`
+    seconds a request stats the file; if the mtime or size moved, the bytes are
+    hashed and, when the content actually changed, parsed into a new snapshot
+    that replaces the old one with a single reference swap. Only one thread
+    reloads at a time; everyone else keeps reading the current snapshot.
+
+    With `binary_path`, the binary snapshot written next to the JSON file is
+    memory-mapped instead of parsing the JSON, as long as it was built from
+    the JSON's current content. The version is the JSON's either way. A
+    binary file that fails its checks, or later fails to decode (see
+    `reject_binary()`), is skipped until it is rewritten.
+    """
+
+    def __init__(self, filepath, check_interval=1.0, binary_path=None):
+        self.filepath = filepath
+        self.binary_path = binary_path
+        self.check_interval = check_interval
+        self._snapshot = DataSnapshot({}, None, None, 0.0)
+        self._stat_key = None
+        self._binary_stat = None  # (mtime_ns, size) of the mapped binary file
+        self._rejected_binary = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def get(self):
+        """Returns the current snapshot, reloading it first if the file changed."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            # The first load must block; later reloads are skipped by any
+            # request that finds another thread already doing the work.
+            blocking = self._snapshot.version is None
+            if self._reload_lock.acquire(blocking=blocking):
+                try:
+                    self._next_check = now + self.check_interval
+                    self._maybe_reload()
+                finally:
+                    self._reload_lock.release()
+        with self._stats_lock:
+            self.hits += 1
+        return self._snapshot
+
+    def reload(self):
+        """Re-checks the file now, waiting for any reload in progress, and returns the snapshot."""
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.check_interval
+            self._maybe_reload()
+        return self._snapshot
+
+    def invalidate(self):
+        """Forces the next `get()` to re-check the file, e.g. after a refresh."""
+        self._next_check = 0.0
+
+    def reject_binary(self, error):
+        """Switches to the JSON file after the mapped snapshot failed to decode, e.g. a file damaged in place."""
+        with self._reload_lock:
+            if self._snapshot.format != "binary":
+                return
+            print(f"Error reading {self.binary_path}, using {self.filepath}: {error}")
+            self.reload_errors += 1
+            self._rejected_binary = self._binary_stat
+            self._stat_key = None
+            self._next_check = time.monotonic() + self.check_interval
+            self._maybe_reload()
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "version": snapshot.version,
+            "mtime": snapshot.mtime,
+            "loaded_at": snapshot.loaded_at,
+            "format": snapshot.format,
+        }
+
+    def _maybe_reload(self):
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            if self._stat_key is not None or self._snapshot.version is None:
+                print(f"Error: Data file not found at {self.filepath}")
+                self._stat_key = None
+            return
+
+        stat_key = (st.st_mtime_ns, st.st_size)
+        if self.binary_path:
+            try:
+                bin_st = os.stat(self.binary_path)
+                if (bin_st.st_mtime_ns, bin_st.st_size) != self._rejected_binary:
+                    stat_key += (bin_st.st_mtime_ns, bin_st.st_size)
+            except FileNotFoundError:
+                pass
+        if stat_key == self._stat_key:
+            return
+        if len(stat_key) > 2 and self._load_binary(st, stat_key):
+            return
+
+        started = time.perf_counter()
+        try:
+            with open(self.filepath, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            print(f"An unexpected error occurred loading {self.filepath}: {e}")
+            self.reload_errors += 1
+            return
+
+        version = content_version(raw)
+        self._stat_key = stat_key
+        if version == self._snapshot.version and self._snapshot.format == "json":
+            return  # touched but unchanged
+
+        try:
+            data = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            # Keep serving the last good snapshot; the writer may retry.
+            print(f"Error: Could not decode JSON from {self.filepath}")
+            self.reload_errors += 1
+            return
+
+        self._snapshot = DataSnapshot(data, version, st.st_mtime, time.time())
+        DATA_LOAD_SECONDS.observe(time.perf_counter() - started, file=os.path.basename(self.filepath))
+        self.reloads += 1
+        print(f"Loaded {self.filepath} (version {version})")
+
+    def _load_binary(self, st, stat_key):
+        """Maps the binary snapshot if it matches the JSON file. Returns False to fall back to the JSON."""
+        started = time.perf_counter()
+        try:
+            # Hashing streams the file; unlike parsing, it keeps nothing in memory
+            version = file_version(self.filepath)
+        except OSError:
+            return False  # reported by the JSON path
+        try:
+            data = BinarySnapshot(self.binary_path)
+            if data.source_version != version:
+                print(f"{self.binary_path} was built from other content than {self.filepath}; using the JSON file")
+                return False
+            self._stat_key = stat_key
+            if version == self._snapshot.version and self._snapshot.format == "binary":
+                return True  # touched but unchanged
+            data.verify()
+        except (OSError, SnapshotError) as e:
+            print(f"Error loading {self.binary_path}, using {self.filepath}: {e}")
+            self.reload_errors += 1
+            self._rejected_binary = stat_key[2:]
+            self._stat_key = None
+            return False
+
+        self._binary_stat = stat_key[2:]
+        self._snapshot = DataSnapshot(data, version, st.st_mtime, time.time(), format="binary")
+        DATA_LOAD_SECONDS.observe(time.perf_counter() - started, file=os.path.basename(self.binary_path))
+        self.reloads += 1
+        print(f"Mapped {self.binary_path} (version {version})")
+        return True
@@ -1,9 +1,7 @@
 import sys
 import os
-import json
 import random
 import requests
-import html # Import the html module
 from flask import Flask, render_template, jsonify, request, session
 # from bs4 import BeautifulSoup # Removed for free-text search removal
 # from duckduckgo_search import DDGS # Removed for free-text search removal
@@ -12,84 +10,203 @@ from flask import Flask, render_template, jsonify, request, session
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from src.data_store import DataStore
+from src.snapshot import SnapshotError
+from src.page_cache import PageCache, page_response
+from src.opentdb import OpenTDBClient, OPENTDB_BASE_URL
+from src.models.user import db
+from src.models import quiz_stats  # registers the answer tables for create_all
+from src.answer_recorder import AnswerRecorder
+from src.routes.user import user_bp
+from src.question_bank import QuestionBank
+from src.batch_store import create_batch_store
+from src.refresh import RefreshManager
+from src.routes.sections import sections_bp
+from src.routes.archive import archive_bp
+from src.archive import record_snapshot
+from src.routes.search import search_bp
+from src.routes.rooms import rooms_bp
+from src.quiz_rooms import QuizRooms
+from src.search_index import SearchService
+from src.routes.assets import assets_bp
+from src.assets import resolve_image
+from src import metrics
+from src.routes.metrics import metrics_bp
+import process_data
+
 app = Flask(__name__, static_folder="static", template_folder="./")
 app.secret_key = os.urandom(24)
 
 DATA_FILE = os.path.join(app.static_folder, "trivia_data.json")
-OPENTDB_API_URL = "https://opentdb.com/api.php"
-OPENTDB_CATEGORIES_URL = "https://opentdb.com/api_category.php"
+# Written by process_data.py alongside DATA_FILE and mapped instead of parsed when current
+DATA_BIN_FILE = os.path.join(app.static_folder, "trivia_data.bin")
+GEO_QUIZ_FILE = os.path.join(app.static_folder, "geo_quiz_data.json")
+# Written by build_assets.py; maps images/... paths to fingerprinted variants
+ASSET_MANIFEST_FILE = os.path.join(app.static_folder, "assets", "manifest.json")
+DATABASE_DIR = os.path.join(os.path.dirname(__file__), "database")
+os.makedirs(DATABASE_DIR, exist_ok=True)
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(DATABASE_DIR, 'app.db')}")
+if DATABASE_URL.startswith("mysql://"):
+    # PyMySQL is the MySQL driver in requirements.txt; plain mysql:// would look for MySQLdb
+    DATABASE_URL = "mysql+pymysql://" + DATABASE_URL[len("mysql://"):]
+app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
+if not DATABASE_URL.startswith("sqlite"):
+    # A bounded pool per worker process. Connections are recycled before MySQL's
+    # wait_timeout (often lowered by hosts) can drop them, and pinged on checkout.
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "280")),
+        "pool_pre_ping": True,
+    }
+# Point this at tools/opentdb_stub.py for local testing
+OPENTDB_BASE_URL = os.environ.get("OPENTDB_BASE_URL", OPENTDB_BASE_URL)
 
 # NLTK download block removed as NLTK is no longer used
 
-def load_data(filepath):
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Data file not found at {filepath}")
-        return {}
-    except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {filepath}")
-        return {}
-    except Exception as e:
-        print(f"An unexpected error occurred loading {filepath}: {e}")
-        return {}
+# Parsed once per worker and hot-reloaded when the file changes on disk
+data_store = DataStore(DATA_FILE, binary_path=DATA_BIN_FILE)
+app.extensions["trivia_data_store"] = data_store
+
+@app.errorhandler(SnapshotError)
+def snapshot_error(e):
+    # The binary data file failed mid-request; later requests read the JSON file
+    data_store.reject_binary(e)
+    return jsonify({"success": False, "error": "Trivia data could not be read; please retry."}), 503
+app.register_blueprint(sections_bp, url_prefix="/api")
+app.register_blueprint(archive_bp, url_prefix="/api")
+app.register_blueprint(search_bp, url_prefix="/api")
+app.register_blueprint(user_bp, url_prefix="/api")
+app.register_blueprint(rooms_bp, url_prefix="/api")
+app.register_blueprint(assets_bp)
+app.register_blueprint(metrics_bp)
+# Per-route latency histograms on /metrics; PROFILE_SAMPLE_RATE=0.01 dumps cProfile
+# stats for 1% of requests and refreshes into PROFILE_DIR
+profiler = metrics.SamplingProfiler(float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+                                    os.environ.get("PROFILE_DIR", os.path.join(DATABASE_DIR, "profiles")))
+metrics.init_app(app, profiler)
+# The geo quiz and asset manifest are small JSON files with the same hot-reload needs
+geo_quiz_store = DataStore(GEO_QUIZ_FILE)
+asset_manifest = DataStore(ASSET_MANIFEST_FILE)
+# Rendered HTML is cached per data version and revalidated with ETags
+page_cache = PageCache()
+# A redeployed template must bump Last-Modified even if the data did not change
+INDEX_TEMPLATE_MTIME = os.path.getmtime(os.path.join(app.root_path, "index.html"))
+# One pooled, rate-limited client shared by every request in this worker
+opentdb = OpenTDBClient(OPENTDB_BASE_URL)
+
+db.init_app(app)
+with app.app_context():
+    db.create_all()
+
+DEFAULT_BATCH_SIZE = 50
+MAX_BATCH_SIZE = int(os.environ.get("QUIZ_MAX_BATCH_SIZE", "200"))
+# Quiz batches are served from the local bank; a background thread tops it up,
+# far enough that the largest batch normally needs no live fetch
+question_bank = QuestionBank(opentdb, low_water=max(150, MAX_BATCH_SIZE))
+question_bank.init_app(app, enabled=os.environ.get("QUESTION_PREFETCH", "1") != "0")
+# Batches live server-side; the cookie only carries the batch ID and a cursor.
+# memory:// is per-worker, so the default is a SQLite file shared by all workers.
+batch_store = create_batch_store(os.environ.get(
+    "QUIZ_BATCH_STORE", f"sqlite:///{os.path.join(DATABASE_DIR, 'quiz_batches.db')}"))
+# Local full-text index over trivia sections, the geo quiz and the question bank
+search_service = SearchService(data_store, GEO_QUIZ_FILE)
+app.extensions["search"] = search_service
+# Graded answers are buffered and written to the stats tables in batches
+answer_recorder = AnswerRecorder(flush_interval=float(os.environ.get("ANSWER_FLUSH_INTERVAL", "2")),
+                                 max_batch=int(os.environ.get("ANSWER_FLUSH_BATCH", "500")))
+answer_recorder.init_app(app)
+app.extensions["answer_recorder"] = answer_recorder
+# Live quiz rooms are held in this worker; src/asgi.py streams their events
+quiz_rooms = QuizRooms(max_rooms=int(os.environ.get("QUIZ_MAX_ROOMS", "100")))
+app.extensions["quiz_rooms"] = quiz_rooms
+# Cache and client counters, read from their stats at scrape time
+metrics.REGISTRY.gauge("trivia_data_store_events", "Trivia data cache hits, reloads and reload errors.",
+                       lambda: {(k,): v for k, v in data_store.stats().items() if k in ("hits", "reloads", "reload_errors")},
+                       ("event",))
+metrics.REGISTRY.gauge("trivia_page_cache_events", "Rendered page cache hits and renders.",
+                       lambda: {(k,): v for k, v in page_cache.stats().items() if k in ("hits", "renders")}, ("event",))
+metrics.REGISTRY.gauge("trivia_opentdb_events", "OpenTDB client calls, coalesced calls, cache hits and rate limits.",
+                       lambda: {(k,): v for k, v in opentdb.stats.items()}, ("event",))
+metrics.REGISTRY.gauge("trivia_answer_recorder_events", "Quiz answers recorded, flushed and dropped, and flush errors.",
+                       lambda: {(k,): v for k, v in answer_recorder.stats.items()}, ("event",))
+metrics.REGISTRY.gauge("trivia_quiz_rooms", "Open quiz rooms, listeners, and events published, delivered and dropped.",
+                       lambda: {(k,): v for k, v in quiz_rooms.stats().items()}, ("stat",))
+metrics.REGISTRY.gauge("trivia_question_bank_events", "Question bank activity counters.",
+                       lambda: {(k,): v for k, v in question_bank.stats.items() if isinstance(v, (int, float))},
+                       ("event",))
+
+def archive_current_data():
+    """Stores the current trivia data as a dated snapshot in the archive tables."""
+    with metrics.REFRESH_STAGE_SECONDS.time(stage="reload"):
+        snapshot = data_store.reload()
+    with app.app_context():
+        try:
+            with metrics.REFRESH_STAGE_SECONDS.time(stage="archive"):
+                record_snapshot(snapshot.data, snapshot.version)
+        except Exception as e:
+            print(f"Error archiving trivia data snapshot: {e}")
+        # Re-index only the sections this refresh changed
+        with metrics.REFRESH_STAGE_SECONDS.time(stage="search_index"):
+            search_service.sync()
+
+archive_current_data()
+
+def run_refresh():
+    with profiler.profile("refresh"):
+        result = process_data.refresh(app.static_folder)
+    for stage, seconds in result.get("stages", {}).items():
+        metrics.REFRESH_STAGE_SECONDS.observe(seconds, stage=stage)
+    return result
+
+# Refreshes run in-process on a background thread, one at a time
+refresh_manager = RefreshManager(run_refresh, on_success=lambda result: archive_current_data())
+# OpenTDB returns at most 50 questions per call
+OPENTDB_MAX_AMOUNT = 50
+# Category value the quiz form uses for the local image questions in geo_quiz_data.json
+GEO_QUIZ_CATEGORY = "geo"
+# The difficulties and question types OpenTDB knows
+QUIZ_DIFFICULTIES = ("easy", "medium", "hard")
+QUIZ_TYPES = ("multiple", "boolean")
+
+def render_index(trivia_data):
+    # Section contents are loaded lazily from /api/sections/<key>, so the page
+    # itself stays the same size no matter how much content there is.
+    movie_source_info = trivia_data.get("movie_source_info", "Unknown Date")
+    with metrics.TEMPLATE_RENDER_SECONDS.time(template="index.html"):
+        return render_template("index.html", movie_source_info=movie_source_info)
 
 @app.route("/")
 def index():
-    trivia_data = load_data(DATA_FILE)
-    events = trivia_data.get("events", [])
-    movies = trivia_data.get("movies", [])
-    music = trivia_data.get("music", [])
-    movie_source_info = trivia_data.get("movie_source_info", "Unknown Date")
-    tv_shows = trivia_data.get("tv_shows", [])
-    hockey_news = trivia_data.get("hockey_news", [])
-    baseball_news = trivia_data.get("baseball_news", [])
-    tennis_news = trivia_data.get("tennis_news", [])
-    golf_news = trivia_data.get("golf_news", [])
-    
-    return render_template("index.html", 
-                           events=events, 
-                           movies=movies, 
-                           music=music, 
-                           movie_source_info=movie_source_info,
-                           tv_shows=tv_shows,
-                           hockey_news=hockey_news,
-                           baseball_news=baseball_news,
-                           tennis_news=tennis_news,
-                           golf_news=golf_news)
+    snapshot = data_store.get()
+    page = page_cache.get("index", snapshot, lambda: render_index(snapshot.data),
+                          last_modified=INDEX_TEMPLATE_MTIME)
+    return page_response(page)
 
 @app.route("/update_data", methods=["POST"])
 def update_data_route():
-    script_path = os.path.join(os.path.dirname(__file__), "..", "process_data.py")
-    # Simplified python executable call, assuming python3.11 is in PATH or using a direct alias
-    # This was causing issues with venv pathing in some contexts.
-    # Render typically uses the python version specified in its settings.
-    python_executable = "python3.11"
-    project_dir = os.path.dirname(os.path.dirname(__file__))
-    
-    if not os.path.exists(script_path):
-        return jsonify({"success": False, "message": "Processing script not found."}), 500
+    job, started = refresh_manager.start()
+    message = "Trivia data refresh started." if started else "A refresh is already running; joined it."
+    return jsonify({"success": True, "message": message, **job.to_dict()}), 202
 
-    try:
-        print(f"Running update script: {python_executable} {script_path} in {project_dir}")
-        # Ensure the command is executed from the project directory context
-        result = os.system(f"cd \"{project_dir}\" && {python_executable} \"{script_path}\"") 
-        if result == 0:
-            return jsonify({"success": True, "message": "Trivia data refreshed successfully."})
-        else:
-             return jsonify({"success": False, "message": f"Data processing script failed with exit code {result}."}), 500
-    except Exception as e:
-        print(f"Error running update script: {e}")
-        return jsonify({"success": False, "message": f"Error running update script: {e}"}), 500
+@app.route("/update_data/status/<job_id>", methods=["GET"])
+def update_data_status(job_id):
+    job = refresh_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown refresh job."}), 404
+    if job.status == "succeeded":
+        message = "Trivia data refreshed successfully."
+    elif job.status == "failed":
+        message = f"Data refresh failed: {job.error}"
+    else:
+        message = "Refresh in progress..."
+    return jsonify({"success": job.status != "failed", "message": message, **job.to_dict()})
 
 @app.route("/api/get_trivia_categories", methods=["GET"])
 def get_trivia_categories():
     try:
-        response = requests.get(OPENTDB_CATEGORIES_URL, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        categories = data.get("trivia_categories", [])
+        categories = opentdb.get_categories()
         if not categories:
             return jsonify({"success": False, "error": "Could not fetch trivia categories from API."}), 500
         return jsonify({"success": True, "categories": categories})
@@ -100,68 +217,108 @@ def get_trivia_categories():
         print(f"Unexpected error fetching categories: {e}")
         return jsonify({"success": False, "error": f"An unexpected error occurred: {e}"}), 500
 
+def parse_quiz_args(args):
+    """Reads the quiz form's query arguments; "any" means no filter.
+
+    Raises ValueError for a difficulty, type or category OpenTDB doesn't
+    have, so made-up values never become question bank buckets.
+    """
+    amount = args.get("amount", DEFAULT_BATCH_SIZE, type=int)
+    amount = max(1, min(amount, MAX_BATCH_SIZE))
+    category_id = args.get("category")
+    difficulty = (args.get("difficulty") or "any").lower()
+    q_type = (args.get("type") or "any").lower()
+
+    category = int(category_id) if category_id and category_id.isdigit() else None
+    difficulty = difficulty if difficulty != "any" else None
+    q_type = q_type if q_type != "any" else None
+    if difficulty is not None and difficulty not in QUIZ_DIFFICULTIES:
+        raise ValueError(f"Unknown difficulty: {difficulty}")
+    if q_type is not None and q_type not in QUIZ_TYPES:
+        raise ValueError(f"Unknown question type: {q_type}")
+    # Checked against the cached list only; the question bank also caps its buckets
+    known_categories = opentdb.cached_categories()
+    if category is not None and known_categories is not None \
+            and category not in {c.get("id") for c in known_categories}:
+        raise ValueError(f"Unknown category: {category}")
+    return amount, category_id, category, difficulty, q_type
+
+def load_geo_quiz_questions(amount):
+    questions = []
+    for q in geo_quiz_store.get().data or []:
+        question = dict(q, category="Geography", difficulty=q.get("difficulty", "mixed"))
+        question["options"] = random.sample(q.get("options", []), len(q.get("options", [])))
+        questions.append(question)
+    random.shuffle(questions)
+    return questions[:amount]
+
+def start_quiz_batch(processed_questions):
+    """Stores a new batch server-side and points the session cursor at its start."""
+    # Shuffled once here; get_quiz_question then just walks a cursor
+    random.shuffle(processed_questions)
+    # Drop the full-batch keys older cookies still carry
+    session.pop("current_quiz_batch", None)
+    session.pop("seen_in_batch_questions", None)
+
+    if not processed_questions:
+        session.pop("quiz_batch_id", None)
+        session.pop("quiz_cursor", None)
+        session.pop("quiz_batch_size", None)
+        session.pop("quiz_answered", None)
+        return jsonify({"success": False, "error": "The API returned no questions for your selected criteria. Please try different options."}), 200
+
+    session["quiz_batch_id"] = batch_store.put(processed_questions)
+    session["quiz_cursor"] = 0
+    session["quiz_batch_size"] = len(processed_questions)
+    session.pop("quiz_answered", None)
+    return jsonify({"success": True, "message": f"{len(processed_questions)} questions fetched successfully.", "count": len(processed_questions)})
+
+def quiz_image(path):
+    """Image fields for a quiz question: fingerprinted variants when built, else the raw static file."""
+    if not path:
+        return {"image_url": None}
+    image = resolve_image(asset_manifest.get().data, path)
+    if image is None:
+        return {"image_url": f"{app.static_url_path}/{path}"}
+    return {"image_url": image["src"], "image": image}
+
 @app.route("/api/fetch_quiz_questions", methods=["GET"])
 def fetch_quiz_questions_from_api():
-    amount = 50
-    category_id = request.args.get("category")
-    difficulty = request.args.get("difficulty", "any")
-    q_type = request.args.get("type", "any")
-
-    params = {"amount": amount}
-    if category_id and category_id.lower() != "any" and category_id.isdigit():
-        params["category"] = int(category_id)
-    if difficulty and difficulty.lower() != "any":
-        params["difficulty"] = difficulty
-    if q_type and q_type.lower() != "any":
-        params["type"] = q_type
+    try:
+        opentdb.get_categories()  # Cached; lets parse_quiz_args check the category
+    except requests.exceptions.RequestException:
+        pass
+    try:
+        amount, category_id, category, difficulty, q_type = parse_quiz_args(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if category_id == GEO_QUIZ_CATEGORY:
+        return start_quiz_batch(load_geo_quiz_questions(amount))
+
+    question_bank.request(category, difficulty, q_type)
 
     try:
-        response = requests.get(OPENTDB_API_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if data.get("response_code") == 0:
-            processed_questions = []
-            for idx, q_data in enumerate(data.get("results", [])):
-                question_text = html.unescape(q_data.get("question"))
-                correct_answer = html.unescape(q_data.get("correct_answer"))
-                incorrect_answers = [html.unescape(ans) for ans in q_data.get("incorrect_answers", [])]
-                
-                options = incorrect_answers + [correct_answer]
-                random.shuffle(options)
-                
-                processed_questions.append({
-                    "id": f"api_q_{idx}_{random.randint(1000,9999)}",
-                    "question": question_text,
-                    "options": options,
-                    "answer": correct_answer,
-                    "type": q_data.get("type"),
-                    "difficulty": q_data.get("difficulty"),
-                    "category": q_data.get("category")
-                })
-            
-            if not processed_questions:
-                session["current_quiz_batch"] = []
-                session["seen_in_batch_questions"] = []
-                session.modified = True
-                return jsonify({"success": False, "error": "The API returned no questions for your selected criteria. Please try different options."}), 200
-            
-            session["current_quiz_batch"] = processed_questions
-            session["seen_in_batch_questions"] = []
-            session.modified = True # Ensure session is saved
-            return jsonify({"success": True, "message": f"{len(processed_questions)} questions fetched successfully.", "count": len(processed_questions)})
-        else:
-            response_code_val = data.get('response_code')
-            error_message = f"OpenTDB API Error (Code: {response_code_val}): "
-            if response_code_val == 1:
-                error_message += "Not enough questions for your query."
-            elif response_code_val == 2:
-                error_message += "Invalid API parameter."
-            elif response_code_val == 5: # Specific check for rate limit
-                error_message += "Rate limit exceeded. Please wait ~5 seconds."
-            else:
-                error_message += "Unknown API error."
-            return jsonify({"success": False, "error": error_message}), 500
+        questions = question_bank.take(amount, category, difficulty, q_type)
+        if question_bank.should_top_up(len(questions), amount, category, difficulty, q_type):
+            # The bank can't fill this request and the bucket wasn't topped up
+            # lately: fetch live, keep the results, then serve from the bank
+            data = question_bank.top_up(min(amount, OPENTDB_MAX_AMOUNT), category, difficulty, q_type)
+            if data.get("response_code") == 0:
+                questions = question_bank.take(amount, category, difficulty, q_type)
+            elif not questions:
+                response_code_val = data.get('response_code')
+                error_message = f"OpenTDB API Error (Code: {response_code_val}): "
+                if response_code_val == 1:
+                    error_message += "Not enough questions for your query."
+                elif response_code_val == 2:
+                    error_message += "Invalid API parameter."
+                elif response_code_val == 5: # Specific check for rate limit
+                    error_message += "Rate limit exceeded. Please wait ~5 seconds."
+                else:
+                    error_message += "Unknown API error."
+                return jsonify({"success": False, "error": error_message}), 500
+
+        return start_quiz_batch([q.to_quiz_dict() for q in questions])
 
     except requests.exceptions.RequestException as e:
         return jsonify({"success": False, "error": f"Failed to fetch questions from OpenTDB: {e}"}), 500
@@ -170,24 +327,81 @@ def fetch_quiz_questions_from_api():
 
 @app.route("/api/get_quiz_question", methods=["GET"])
 def get_quiz_question():
-    current_batch = session.get("current_quiz_batch", [])
-    if not current_batch:
+    batch_id = session.get("quiz_batch_id")
+    if not batch_id:
         return jsonify({"error": "No questions fetched yet. Please fetch a new set.", "end_of_batch": True}), 404
 
-    seen_in_batch_ids = session.get("seen_in_batch_questions", [])
-    available_questions = [q for q in current_batch if q.get("id") not in seen_in_batch_ids]
-
-    if not available_questions:
+    cursor = session.get("quiz_cursor", 0)
+    if cursor >= session.get("quiz_batch_size", 0):
         return jsonify({"error": "All questions in this batch have been answered. Fetch a new set?", "end_of_batch": True}), 200
 
-    question = random.choice(available_questions)
-    seen_in_batch_ids.append(question.get("id"))
-    session["seen_in_batch_questions"] = seen_in_batch_ids
-    session.modified = True # Ensure session is saved
-    question["image_url"] = None # No images for API questions for now
+    question = batch_store.get_item(batch_id, cursor)
+    if question is None: # Batch expired from the store
+        return jsonify({"error": "No questions fetched yet. Please fetch a new set.", "end_of_batch": True}), 404
+
+    session["quiz_cursor"] = cursor + 1
+    question.update(quiz_image(question.pop("image", None)))
     return jsonify(question)
 
-# Free-text search API endpoint and helper functions have been removed.
+@app.route("/api/submit_answer", methods=["POST"])
+def submit_answer():
+    """Grades the answer to the question last served from this session's batch.
+
+    Body: {"question_id": ..., "answer": ..., "user_id": optional}. The user ID
+    is remembered in the session. Answers from known users are buffered by
+    the answer recorder and show up in /api/users/<id>/quiz_stats after the
+    next flush.
+    """
+    data = request.get_json(silent=True) or {}
+    batch_id = session.get("quiz_batch_id")
+    cursor = session.get("quiz_cursor", 0)
+    if not batch_id or cursor == 0:
+        return jsonify({"success": False, "error": "No question has been served yet."}), 404
+    if "answer" not in data:
+        return jsonify({"success": False, "error": "An answer is required."}), 400
+
+    question = batch_store.get_item(batch_id, cursor - 1)
+    if question is None: # Batch expired from the store
+        return jsonify({"success": False, "error": "No questions fetched yet. Please fetch a new set."}), 404
+    if str(data.get("question_id", question.get("id"))) != str(question.get("id")):
+        return jsonify({"success": False, "error": "That is not the current question."}), 409
+    if session.get("quiz_answered") == cursor:
+        return jsonify({"success": False, "error": "This question has already been answered."}), 409
+    session["quiz_answered"] = cursor
+
+    correct = data["answer"] == question.get("answer")
+    user_id = data.get("user_id", session.get("user_id"))
+    recorded = False
+    if isinstance(user_id, int) and not isinstance(user_id, bool) and answer_recorder.user_exists(user_id):
+        session["user_id"] = user_id
+        answer_recorder.record(user_id, question.get("id"), question.get("category"), correct)
+        recorded = True
+    return jsonify({"success": True, "correct": correct, "correct_answer": question.get("answer"), "recorded": recorded})
+
+@app.route("/api/rooms", methods=["POST"])
+def create_quiz_room():
+    """Turns the host's current quiz batch into a room that every participant plays together."""
+    questions = batch_store.get(session.get("quiz_batch_id"))
+    if not questions:
+        return jsonify({"success": False, "error": "No questions fetched yet. Please fetch a new set."}), 404
+    for question in questions:
+        question.update(quiz_image(question.pop("image", None)))
+    room = quiz_rooms.create(questions)
+    if room is None:
+        return jsonify({"success": False, "error": "Too many open rooms. Try again later."}), 503
+    return jsonify({"success": True, "room_id": room.id, "host_token": room.host_token, "count": len(questions)}), 201
+
+@app.route("/api/data_stats", methods=["GET"])
+def data_stats():
+    stats = data_store.stats()
+    stats["page_cache"] = page_cache.stats()
+    stats["opentdb"] = opentdb.stats
+    stats["question_bank"] = question_bank.stats
+    stats["answer_recorder"] = dict(answer_recorder.stats, pending=answer_recorder.pending())
+    stats["quiz_rooms"] = quiz_rooms.stats()
+    return jsonify(stats)
+
+# Free-text search is served locally by /api/search (src/routes/search.py).
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,288 @@
+import cProfile
+import math
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+
+# Prometheus' default buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_NAME_RE = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Invalid metric name: {name}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, rendered like prometheus_client's."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        with self._lock:
+            series = {k: (list(counts), total, n) for k, (counts, total, n) in self._series.items()}
+        lines = self.header()
+        for key, (counts, total, n) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {n}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time.
+
+    The callback returns a number, or a dict mapping label values (a tuple
+    matching `labelnames`) to numbers. Exceptions skip the metric.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {e}")
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        lines = self.header()
+        for label_values, v in sorted(value.items()):
+            if v is None:
+                continue
+            lines.append(f"{self.name}{_format_labels(tuple(zip(self.labelnames, label_values)))} {_format_value(v)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()):
+        return self.register(CallbackGauge(name, documentation, callback, labelnames))
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry. Each gunicorn worker keeps its own, so Prometheus
+# should scrape workers individually or the numbers are per-worker samples.
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "trivia_http_request_duration_seconds", "Time spent handling HTTP requests.",
+    ("method", "route", "status"))
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "trivia_upstream_request_duration_seconds", "Time spent on HTTP calls to upstream services.",
+    ("service", "endpoint", "outcome"))
+DATA_LOAD_SECONDS = REGISTRY.histogram(
+    "trivia_data_load_duration_seconds", "Time spent reading and parsing a JSON data file.", ("file",))
+TEMPLATE_RENDER_SECONDS = REGISTRY.histogram(
+    "trivia_template_render_duration_seconds", "Time spent rendering a page template on a cache miss.",
+    ("template",))
+REFRESH_STAGE_SECONDS = REGISTRY.histogram(
+    "trivia_refresh_stage_duration_seconds", "Time spent in each stage of the data refresh pipeline.",
+    ("stage",), buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0))
+PROFILES_WRITTEN = REGISTRY.counter(
+    "trivia_profiles_written_total", "Sampled cProfile dumps written by the profiler hook.", ("name",))
+
+
+@contextmanager
+def time_upstream(service, endpoint):
+    """Times one upstream call; the outcome label is "error" if the block raised."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                         service=service, endpoint=endpoint, outcome=outcome)
+
+
+class SamplingProfiler:
+    """Opt-in cProfile hook for hot paths.
+
+    With a sample rate above zero, that fraction of profiled sections (HTTP
+    requests, refresh runs) runs under cProfile and is dumped to
+    `directory/<name>-<timestamp>.prof` for pstats or snakeviz. Disabled by
+    default; sampling keeps the overhead off every other call.
+    """
+
+    def __init__(self, sample_rate=0.0, directory=None):
+        self.sample_rate = sample_rate
+        self.directory = directory
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 and bool(self.directory)
+
+    def start(self):
+        """Returns a running profiler for a sampled call, else None."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is already active in this thread
+            return None
+        return profiler
+
+    def stop(self, profiler, name):
+        profiler.disable()
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "root"
+        path = os.path.join(self.directory, f"{safe_name}-{time.time():.6f}.prof")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(path)
+            PROFILES_WRITTEN.inc(name=name)
+        except OSError as e:
+            print(f"Error writing profile {path}: {e}")
+
+    @contextmanager
+    def profile(self, name):
+        profiler = self.start()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                self.stop(profiler, name)
+
+
+def init_app(app, profiler=None):
+    """Times every request by route template and, if enabled, samples it with the profiler."""
+    app.extensions["metrics"] = REGISTRY
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_started = time.perf_counter()
+        g._metrics_profiler = profiler.start() if profiler is not None else None
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("_metrics_started", None)
+        rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                         route=rule, status=str(response.status_code))
+        running = g.pop("_metrics_profiler", None)
+        if running is not None:
+            profiler.stop(running, f"{request.method}_{rule}")
+        return response
+
+    @app.teardown_request
+    def _stop_orphaned_profiler(exc):
+        # after_request does not run when a view raises
+        running = g.pop("_metrics_profiler", None)
+        if running is not None:
+            running.disable()
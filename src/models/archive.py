@@ -0,0 +1,54 @@
+import json
+from datetime import datetime
+
+from src.models.user import db
+
+
+class ArchiveSnapshot(db.Model):
+    """One refresh of trivia_data.json, identified by its content version."""
+    __tablename__ = 'archive_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(40), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    item_count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchiveSnapshot {self.version}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'version': self.version,
+            'created_at': self.created_at.isoformat(),
+            'item_count': self.item_count
+        }
+
+
+class ArchiveItem(db.Model):
+    """A section item, stored once and linked to the snapshots it first and last appeared in."""
+    __tablename__ = 'archive_items'
+    __table_args__ = (
+        db.UniqueConstraint('section', 'item_hash', name='uq_archive_items_section_hash'),
+        # Serves "section X between dates A and B", ordered by date
+        db.Index('ix_archive_items_section_date', 'section', 'item_date', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    section = db.Column(db.String(50), nullable=False)
+    item_hash = db.Column(db.String(40), nullable=False)
+    item_date = db.Column(db.Date, nullable=False)
+    first_snapshot_id = db.Column(db.Integer, db.ForeignKey('archive_snapshots.id'), nullable=False, index=True)
+    last_snapshot_id = db.Column(db.Integer, db.ForeignKey('archive_snapshots.id'), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchiveItem {self.section} {self.item_date}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'section': self.section,
+            'date': self.item_date.isoformat(),
+            'item': json.loads(self.payload)
+        }
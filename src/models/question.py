@@ -0,0 +1,40 @@
+import json
+import random
+from datetime import datetime
+
+from src.models.user import db
+
+
+class Question(db.Model):
+    __tablename__ = 'questions'
+    __table_args__ = (
+        db.Index('ix_questions_bucket', 'category_id', 'difficulty', 'type'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # sha1 of the normalized question text, used to de-duplicate across fetches
+    text_hash = db.Column(db.String(40), unique=True, nullable=False)
+    category_id = db.Column(db.Integer, index=True)
+    category = db.Column(db.String(120))
+    difficulty = db.Column(db.String(10))
+    type = db.Column(db.String(10))
+    question = db.Column(db.Text, nullable=False)
+    correct_answer = db.Column(db.Text, nullable=False)
+    incorrect_answers = db.Column(db.Text, nullable=False, default='[]')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Question {self.id} {self.category_id}/{self.difficulty}>'
+
+    def to_quiz_dict(self):
+        options = json.loads(self.incorrect_answers) + [self.correct_answer]
+        random.shuffle(options)
+        return {
+            'id': f'q_{self.id}',
+            'question': self.question,
+            'options': options,
+            'answer': self.correct_answer,
+            'type': self.type,
+            'difficulty': self.difficulty,
+            'category': self.category
+        }
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from src.models.user import db
+
+
+class QuizAnswer(db.Model):
+    """One graded answer. Written in bulk by the AnswerRecorder, never read on the request path."""
+    __tablename__ = 'quiz_answers'
+    __table_args__ = (
+        db.Index('ix_quiz_answers_user_time', 'user_id', 'answered_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.String(40), nullable=False)
+    category = db.Column(db.String(120), nullable=False)
+    correct = db.Column(db.Boolean, nullable=False)
+    answered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class UserCategoryStats(db.Model):
+    """Running per-user, per-category totals, kept up to date on every flush of QuizAnswer rows."""
+    __tablename__ = 'user_category_stats'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'category', name='uq_user_category_stats'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    category = db.Column(db.String(120), nullable=False)
+    answered = db.Column(db.Integer, default=0, nullable=False)
+    correct = db.Column(db.Integer, default=0, nullable=False)
+    last_answered_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<UserCategoryStats {self.user_id}/{self.category}>'
+
+    def to_dict(self):
+        return {
+            'category': self.category,
+            'answered': self.answered,
+            'correct': self.correct,
+            'accuracy': round(self.correct / self.answered, 4) if self.answered else None,
+            'last_answered_at': self.last_answered_at.isoformat() if self.last_answered_at else None
+        }
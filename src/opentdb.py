@@ -0,0 +1,316 @@
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.metrics import time_upstream
+
+try:
+    import httpx
+except ImportError:  # Only the ASGI serving mode (src/asgi.py) needs httpx
+    httpx = None
+
+OPENTDB_BASE_URL = "https://opentdb.com"
+
+# OpenTDB response codes (https://opentdb.com/api_config.php)
+RESPONSE_SUCCESS = 0
+RESPONSE_NO_RESULTS = 1
+RESPONSE_INVALID_PARAMETER = 2
+RESPONSE_TOKEN_NOT_FOUND = 3
+RESPONSE_TOKEN_EMPTY = 4
+RESPONSE_RATE_LIMIT = 5
+
+
+class OpenTDBRateLimited(requests.exceptions.RequestException):
+    """Raised when a call would have to wait longer than allowed for the rate limiter."""
+
+
+# Upstream responses already fetched for the current request, keyed like
+# in-flight calls. The ASGI layer fills this from its non-blocking client so
+# the Flask view, running in a worker thread, does not call OpenTDB again.
+prefetched_responses = contextvars.ContextVar("opentdb_prefetched_responses", default=None)
+
+
+def _request_key(path, params):
+    return (path, tuple(sorted(params.items())))
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    OpenTDB allows one call per IP every 5 seconds, so the defaults are a
+    bucket of one token refilled every 5 seconds. `penalize()` empties the
+    bucket when upstream tells us we went too fast anyway (e.g. another worker
+    on the same IP spent the slot).
+    """
+
+    def __init__(self, rate=1 / 5.0, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, max_wait=None):
+        """Takes one token now and returns how long the caller must wait before using it.
+
+        Raises OpenTDBRateLimited without consuming anything if the wait would
+        exceed `max_wait`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                raise OpenTDBRateLimited(f"OpenTDB rate limit: next slot in {wait:.1f}s")
+            # Reserve the token now so concurrent callers queue up behind us
+            self._tokens -= 1
+        return wait
+
+    def acquire(self, max_wait=None):
+        """Takes one token, sleeping until one is available. Returns the time waited."""
+        wait = self.reserve(max_wait)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, seconds=None):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            seconds = seconds if seconds is not None else 1 / self.rate
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+            self._updated = now
+
+
+def question_params(amount, category=None, difficulty=None, q_type=None, token=None):
+    params = {"amount": amount}
+    if category:
+        params["category"] = category
+    if difficulty:
+        params["difficulty"] = difficulty
+    if q_type:
+        params["type"] = q_type
+    if token:
+        params["token"] = token
+    return params
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class OpenTDBClient:
+    """Shared OpenTDB client: pooled session, cached categories, rate limiting
+    and coalescing of identical in-flight requests."""
+
+    def __init__(self, base_url=OPENTDB_BASE_URL, timeout=10, category_ttl=3600,
+                 rate=1 / 5.0, max_wait=6.0, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.category_ttl = category_ttl
+        self.max_wait = max_wait
+        self.limiter = TokenBucket(rate=rate)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._categories = None
+        self._categories_expires = 0.0
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # Bumped from request threads, the question prefetch thread and the
+        # event loop (AsyncOpenTDBClient shares it), so only through count()
+        self.stats = {"upstream_calls": 0, "coalesced": 0, "category_cache_hits": 0,
+                      "rate_limited": 0}
+        self._stats_lock = threading.Lock()
+
+    def count(self, event):
+        with self._stats_lock:
+            self.stats[event] += 1
+
+    def cached_categories(self):
+        """Returns the cached category list, or None if it is missing or expired."""
+        if self._categories is not None and time.monotonic() < self._categories_expires:
+            self.count("category_cache_hits")
+            return self._categories
+        return None
+
+    def cache_categories(self, data):
+        categories = data.get("trivia_categories", [])
+        if categories:
+            self._categories = categories
+            self._categories_expires = time.monotonic() + self.category_ttl
+        return categories
+
+    def get_categories(self):
+        """Returns the OpenTDB category list, served from a TTL cache."""
+        categories = self.cached_categories()
+        if categories is not None:
+            return categories
+        # The category endpoint is not subject to the question rate limit
+        return self.cache_categories(self._coalesced("/api_category.php", {}, limited=False))
+
+    def fetch_questions(self, amount, category=None, difficulty=None, q_type=None,
+                        token=None, max_wait=None):
+        """Calls /api.php and returns the decoded payload (response_code + results)."""
+        return self._coalesced("/api.php", question_params(amount, category, difficulty, q_type, token),
+                               max_wait=max_wait)
+
+    def request_token(self):
+        data = self._get_json("/api_token.php", {"command": "request"}, limited=False)
+        return data.get("token")
+
+    def reset_token(self, token):
+        self._get_json("/api_token.php", {"command": "reset", "token": token}, limited=False)
+
+    def _coalesced(self, path, params, limited=True, max_wait=None):
+        key = _request_key(path, params)
+        prefetched = prefetched_responses.get()
+        if prefetched and key in prefetched:
+            result = prefetched[key]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._inflight[key] = _Call()
+            else:
+                self.count("coalesced")
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = self._get_json(path, params, limited=limited, max_wait=max_wait)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def _get_json(self, path, params, limited=True, max_wait=None):
+        if max_wait is None:
+            max_wait = self.max_wait
+        for attempt in itertools.count():
+            if limited:
+                self.limiter.acquire(max_wait=max_wait)
+            self.count("upstream_calls")
+            with time_upstream("opentdb", path):
+                response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.json()
+            if not self.should_retry(data, attempt, limited):
+                return data
+
+    def should_retry(self, data, attempt, limited=True):
+        """Handles OpenTDB's answer to call number `attempt` (from 0); True means make the call again.
+
+        Shared by both clients. A rate-limit response means someone else
+        spent our slot, so the limiter backs off for a full window and a
+        rate-limited call is retried once.
+        """
+        if data.get("response_code") != RESPONSE_RATE_LIMIT:
+            return False
+        self.count("rate_limited")
+        self.limiter.penalize()
+        return limited and attempt == 0
+
+
+class AsyncOpenTDBClient:
+    """Non-blocking counterpart of OpenTDBClient for the ASGI serving mode.
+
+    Shares the wrapped client's rate limiter, category cache and stats, so
+    both clients together still respect OpenTDB's one-call-per-5-seconds
+    limit. Waiting for the limiter or for upstream happens on the event loop
+    instead of holding a worker thread. Identical in-flight calls are
+    coalesced, and httpx errors surface as requests exceptions so the Flask
+    views handle them exactly like failures of the blocking client.
+    """
+
+    def __init__(self, client, pool_size=20):
+        if httpx is None:
+            raise RuntimeError("The ASGI serving mode needs httpx (pip install httpx).")
+        self.client = client
+        self.pool_size = pool_size
+        self._http = None
+        self._inflight = {}
+
+    async def get_categories(self):
+        categories = self.client.cached_categories()
+        if categories is not None:
+            return categories
+        return self.client.cache_categories(await self.fetch("/api_category.php", {}, limited=False))
+
+    async def fetch_questions(self, amount, category=None, difficulty=None, q_type=None, max_wait=None):
+        return await self.fetch("/api.php", question_params(amount, category, difficulty, q_type),
+                                max_wait=max_wait)
+
+    async def fetch(self, path, params, limited=True, max_wait=None):
+        key = _request_key(path, params)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.client.count("coalesced")
+            return await asyncio.shield(future)
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._get_json(path, params, limited, max_wait)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _get_json(self, path, params, limited, max_wait):
+        if self._http is None:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            self._http = httpx.AsyncClient(timeout=self.client.timeout, limits=limits)
+        if max_wait is None:
+            max_wait = self.client.max_wait
+        for attempt in itertools.count():
+            if limited:
+                wait = self.client.limiter.reserve(max_wait=max_wait)
+                if wait:
+                    await asyncio.sleep(wait)
+            self.client.count("upstream_calls")
+            try:
+                with time_upstream("opentdb", path):
+                    response = await self._http.get(self.client.base_url + path, params=params)
+                    response.raise_for_status()
+                    data = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                raise requests.exceptions.RequestException(f"OpenTDB request failed: {e}") from e
+            if not self.client.should_retry(data, attempt, limited):
+                return data
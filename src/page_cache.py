@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+
+class RenderedPage:
+    """One rendered HTML page plus its pre-compressed variants."""
+
+    def __init__(self, body, version, last_modified):
+        self.version = version
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9)
+        self.br_body = brotli.compress(body, quality=11) if brotli else None
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.last_modified = int(last_modified or 0)
+        self.last_modified_http = formatdate(self.last_modified, usegmt=True)
+
+
+class PageCache:
+    """Caches rendered pages per data snapshot version.
+
+    A page is rendered at most once per (key, version); concurrent misses for
+    the same key wait for the first render instead of repeating it.
+    """
+
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    def get(self, key, snapshot, render, last_modified=None):
+        page = self._pages.get(key)
+        if page is not None and page.version == snapshot.version:
+            self.hits += 1
+            return page
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None or page.version != snapshot.version:
+                body = render().encode("utf-8")
+                page = RenderedPage(body, snapshot.version,
+                                    max(snapshot.mtime or 0, last_modified or 0))
+                self._pages[key] = page
+                self.renders += 1
+            else:
+                self.hits += 1
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "renders": self.renders, "pages": len(self._pages)}
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Encoded variants carry a suffix, but all represent the same page
+        if candidate.strip('"').split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header, last_modified):
+    if not header or not last_modified:
+        return False
+    try:
+        return int(parsedate_to_datetime(header).timestamp()) >= last_modified
+    except (TypeError, ValueError):
+        return False
+
+
+def page_response(page, mimetype="text/html"):
+    """Builds a response for `page`, honouring conditional and encoding headers."""
+    # q-values, so "br;q=0" rules brotli out; brotli wins ties
+    br_quality = request.accept_encodings["br"] if page.br_body is not None else 0
+    gzip_quality = request.accept_encodings["gzip"]
+    if br_quality and br_quality >= gzip_quality:
+        body, encoding, etag = page.br_body, "br", f'"{page.etag}-br"'
+    elif gzip_quality:
+        body, encoding, etag = page.gzip_body, "gzip", f'"{page.etag}-gz"'
+    else:
+        body, encoding, etag = page.body, None, f'"{page.etag}"'
+
+    if_none_match = request.headers.get("If-None-Match")
+    if (_etag_matches(if_none_match, page.etag)
+            or (if_none_match is None
+                and _not_modified_since(request.headers.get("If-Modified-Since"), page.last_modified))):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = page.last_modified_http
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
@@ -0,0 +1,268 @@
+import hashlib
+import html
+import json
+import random
+import re
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from src import opentdb as opentdb_api
+from src.models.question import Question
+from src.models.user import db
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_question(text):
+    """Lowercases, unescapes and strips punctuation so trivially different copies match."""
+    return _NON_WORD_RE.sub(" ", html.unescape(text or "").lower()).strip()
+
+
+def question_hash(text):
+    return hashlib.sha1(normalize_question(text).encode("utf-8")).hexdigest()
+
+
+def _bucket_filter(query, category_id, difficulty, q_type):
+    if category_id is not None:
+        query = query.filter(Question.category_id == category_id)
+    if difficulty:
+        query = query.filter(Question.difficulty == difficulty)
+    if q_type:
+        query = query.filter(Question.type == q_type)
+    return query
+
+
+def _category_quotas(amount, counts):
+    """Splits `amount` across categories as evenly as their `counts` allow."""
+    quotas = {}
+    open_categories = [c for c, n in counts.items() if n]
+    random.shuffle(open_categories)  # Who gets the remainder
+    while amount and open_categories:
+        share, extra = divmod(amount, len(open_categories))
+        for i, category in enumerate(open_categories):
+            given = min(share + (i < extra), counts[category] - quotas.get(category, 0))
+            quotas[category] = quotas.get(category, 0) + given
+            amount -= given
+        open_categories = [c for c in open_categories if quotas[c] < counts[c]]
+    return {c: n for c, n in quotas.items() if n}
+
+
+class QuestionBank:
+    """Local, de-duplicated store of OpenTDB questions with a background refill worker.
+
+    Quiz requests are answered from the `questions` table. Every bucket
+    (category, difficulty, type) a user asks for is remembered; a daemon thread
+    keeps those buckets above `low_water` questions by fetching from OpenTDB
+    with a session token, paced by the client's rate limiter. A request the
+    bank can't fill is topped up with a live fetch at most once per bucket
+    every `top_up_interval` seconds; otherwise it gets what the bank has while
+    the worker refills the bucket.
+    """
+
+    def __init__(self, client, low_water=150, batch_size=50, idle_interval=30.0,
+                 demand_ttl=24 * 3600, exhausted_backoff=3600, top_up_interval=300, max_buckets=512):
+        self.client = client
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.demand_ttl = demand_ttl
+        self.max_buckets = max_buckets
+        self.exhausted_backoff = exhausted_backoff
+        self.top_up_interval = top_up_interval
+        self.enabled = True
+        self._app = None
+        # The "any/any/any" bucket is always kept warm
+        self._demand = {(None, None, None): float("inf")}
+        self._exhausted = {}
+        # When each bucket was last topped up by a live fetch in a request
+        self._topped_up = {}
+        self._token = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"served": 0, "inserted": 0, "duplicates": 0, "top_ups": 0, "prefetch_calls": 0,
+                      "prefetch_errors": 0}
+
+    def init_app(self, app, enabled=True):
+        self._app = app
+        self.enabled = enabled
+
+    # --- Storage -------------------------------------------------------------
+
+    def store(self, results, category_id=None):
+        """Inserts raw OpenTDB results, skipping ones already in the bank. Returns the insert count."""
+        rows = {}
+        for q_data in results:
+            question_text = html.unescape(q_data.get("question", ""))
+            text_hash = question_hash(question_text)
+            if not question_text or text_hash in rows:
+                continue
+            rows[text_hash] = Question(
+                text_hash=text_hash,
+                category_id=category_id if category_id is not None else self._category_id(q_data.get("category")),
+                category=html.unescape(q_data.get("category") or ""),
+                difficulty=q_data.get("difficulty"),
+                type=q_data.get("type"),
+                question=question_text,
+                correct_answer=html.unescape(q_data.get("correct_answer", "")),
+                incorrect_answers=json.dumps([html.unescape(a) for a in q_data.get("incorrect_answers", [])]),
+            )
+        if not rows:
+            return 0
+
+        existing = {h for (h,) in db.session.query(Question.text_hash)
+                    .filter(Question.text_hash.in_(list(rows)))}
+        new_rows = [row for h, row in rows.items() if h not in existing]
+        self.stats["duplicates"] += len(rows) - len(new_rows)
+        try:
+            db.session.add_all(new_rows)
+            db.session.commit()
+        except IntegrityError:
+            # Another worker inserted some of these in the meantime; go row by row
+            db.session.rollback()
+            inserted = []
+            for row in new_rows:
+                try:
+                    db.session.add(row)
+                    db.session.commit()
+                    inserted.append(row)
+                except IntegrityError:
+                    db.session.rollback()
+            new_rows = inserted
+        self.stats["inserted"] += len(new_rows)
+        return len(new_rows)
+
+    def take(self, amount, category_id=None, difficulty=None, q_type=None):
+        """Returns up to `amount` random questions from the bucket.
+
+        Without a category, the batch is split as evenly as the bank allows
+        across the categories it holds, so it isn't mostly whichever category
+        was prefetched last.
+        """
+        query = _bucket_filter(Question.query, category_id, difficulty, q_type)
+        if category_id is not None:
+            questions = query.order_by(func.random()).limit(amount).all()
+        else:
+            counts = dict(_bucket_filter(db.session.query(Question.category, func.count(Question.id)),
+                                         None, difficulty, q_type).group_by(Question.category))
+            questions = []
+            for category, quota in _category_quotas(amount, counts).items():
+                questions.extend(query.filter(Question.category == category)
+                                 .order_by(func.random()).limit(quota))
+            random.shuffle(questions)
+        self.stats["served"] += len(questions)
+        return questions
+
+    def should_top_up(self, have, amount, category_id=None, difficulty=None, q_type=None):
+        """True when a request for `amount` questions, of which the bank has `have`, should fetch live."""
+        if have >= amount:
+            return False
+        bucket = (category_id, difficulty, q_type)
+        now = time.time()
+        with self._lock:
+            return (self._exhausted.get(bucket, 0) <= now
+                    and now - self._topped_up.get(bucket, 0) >= self.top_up_interval)
+
+    def top_up(self, amount, category_id=None, difficulty=None, q_type=None):
+        """Fetches `amount` questions live and banks them. Returns the raw OpenTDB response.
+
+        Blocks the calling request, so should_top_up() allows it only once per
+        bucket every `top_up_interval` seconds, whatever the outcome.
+        """
+        with self._lock:
+            self._topped_up[(category_id, difficulty, q_type)] = time.time()
+        self.stats["top_ups"] += 1
+        data = self.client.fetch_questions(amount, category=category_id, difficulty=difficulty, q_type=q_type)
+        if data.get("response_code") == opentdb_api.RESPONSE_SUCCESS:
+            self.store(data.get("results", []), category_id=category_id)
+        return data
+
+    def count(self, category_id=None, difficulty=None, q_type=None):
+        return _bucket_filter(db.session.query(func.count(Question.id)),
+                              category_id, difficulty, q_type).scalar()
+
+    def _category_id(self, category_name):
+        try:
+            categories = self.client.get_categories()
+        except Exception:
+            return None
+        name = html.unescape(category_name or "")
+        for category in categories:
+            if category.get("name") == name:
+                return category.get("id")
+        return None
+
+    # --- Background refill ---------------------------------------------------
+
+    def request(self, category_id=None, difficulty=None, q_type=None):
+        """Records demand for a bucket and makes sure the refill worker is running."""
+        bucket = (category_id, difficulty, q_type)
+        with self._lock:
+            if bucket not in self._demand and len(self._demand) >= self.max_buckets:
+                # Forget the least recently requested bucket (never the "any" one)
+                del self._demand[min(self._demand, key=self._demand.get)]
+            self._demand[bucket] = time.time()
+        if not self.enabled or self._app is None:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="question-prefetch", daemon=True)
+                    self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            try:
+                with self._app.app_context():
+                    did_work = self._refill_once()
+                    db.session.remove()
+            except Exception as e:
+                print(f"Question prefetch error: {e}")
+                self.stats["prefetch_errors"] += 1
+                did_work = False
+            if not did_work:
+                self._wakeup.wait(self.idle_interval)
+                self._wakeup.clear()
+
+    def _pick_bucket(self):
+        now = time.time()
+        with self._lock:
+            for bucket, requested_at in list(self._demand.items()):
+                if now - requested_at > self.demand_ttl:
+                    del self._demand[bucket]
+            buckets = [b for b in self._demand if self._exhausted.get(b, 0) <= now]
+        lowest, lowest_count = None, None
+        for bucket in buckets:
+            count = self.count(*bucket)
+            if count < self.low_water and (lowest_count is None or count < lowest_count):
+                lowest, lowest_count = bucket, count
+        return lowest
+
+    def _refill_once(self):
+        bucket = self._pick_bucket()
+        if bucket is None:
+            return False
+        category_id, difficulty, q_type = bucket
+        if self._token is None:
+            self._token = self.client.request_token()
+
+        self.stats["prefetch_calls"] += 1
+        # Background fetches are happy to wait out the limiter
+        data = self.client.fetch_questions(self.batch_size, category=category_id, difficulty=difficulty,
+                                           q_type=q_type, token=self._token, max_wait=60)
+        code = data.get("response_code")
+        if code == opentdb_api.RESPONSE_SUCCESS:
+            self.store(data.get("results", []), category_id=category_id)
+        elif code == opentdb_api.RESPONSE_TOKEN_NOT_FOUND:
+            self._token = None
+        elif code in (opentdb_api.RESPONSE_NO_RESULTS, opentdb_api.RESPONSE_TOKEN_EMPTY,
+                      opentdb_api.RESPONSE_INVALID_PARAMETER, opentdb_api.RESPONSE_RATE_LIMIT):
+            # We have everything OpenTDB has for this bucket, or it can't be fetched
+            # right now; check back later instead of picking it again at once
+            with self._lock:
+                self._exhausted[bucket] = time.time() + self.exhausted_backoff
+        return True
@@ -0,0 +1,381 @@
+import asyncio
+import json
+import queue
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+
+# Sent when a listener has been idle this long, so proxies keep the stream open
+# and dead connections are noticed
+HEARTBEAT_INTERVAL = 15.0
+HEARTBEAT = b": ping\n\n"
+SSE_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # nginx would otherwise buffer the stream
+}
+
+
+def format_event(event_id, event, data):
+    """Serializes one SSE event. The bytes are shared by every subscriber."""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class Subscriber(ABC):
+    """One SSE listener and its bounded queue of serialized events.
+
+    A tally that does not fit in a full queue is skipped, since the next one
+    supersedes it. Any other event that does not fit closes the subscription:
+    the browser's EventSource reconnects and is replayed the current state,
+    which is cheaper than buffering without bound for a client that stopped
+    reading.
+    """
+
+    loop = None
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.closed = False
+        self.lagged = False
+
+    @abstractmethod
+    def offer(self, payload, droppable=False):
+        """Queues an event without blocking. Returns False if it was not queued."""
+
+    @abstractmethod
+    def close(self, lagged=False):
+        """Ends the stream; `lagged` marks a listener closed for falling behind."""
+
+
+class ThreadSubscriber(Subscriber):
+    """Listener read by a WSGI worker thread (the Flask streaming route)."""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self._queue = queue.Queue(maxsize)
+
+    def offer(self, payload, droppable=False):
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            if not droppable:
+                self.close(lagged=True)
+            return False
+
+    def close(self, lagged=False):
+        self.lagged = self.lagged or lagged
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # The reader is not blocked and sees `closed` next
+
+    def events(self, heartbeat=HEARTBEAT_INTERVAL):
+        """Yields serialized events, or a heartbeat after `heartbeat` idle seconds, until closed."""
+        while not self.closed:
+            try:
+                payload = self._queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield HEARTBEAT
+                continue
+            if payload is None:
+                return
+            yield payload
+
+
+class AsyncSubscriber(Subscriber):
+    """Listener served by a coroutine on an event loop (the ASGI path).
+
+    `offer` and `close` must run on that loop; rooms hand events over with
+    one call_soon_threadsafe per loop, not one per subscriber.
+    """
+
+    def __init__(self, loop, maxsize):
+        super().__init__(maxsize)
+        self.loop = loop
+        self._queue = asyncio.Queue(maxsize)
+
+    def offer(self, payload, droppable=False):
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            if not droppable:
+                self.close(lagged=True)
+            return False
+
+    def close(self, lagged=False):
+        self.lagged = self.lagged or lagged
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def next_event(self, heartbeat=HEARTBEAT_INTERVAL):
+        """Returns the next serialized event, a heartbeat after `heartbeat` idle seconds, or None once closed."""
+        if self.closed:
+            return None
+        try:
+            return await asyncio.wait_for(self._queue.get(), heartbeat)
+        except asyncio.TimeoutError:
+            return HEARTBEAT
+
+
+def _deliver(subscribers, payload, droppable, stats):
+    for subscriber in subscribers:
+        if subscriber.closed:
+            continue
+        if subscriber.offer(payload, droppable):
+            stats["deliveries"] += 1
+        elif droppable:
+            stats["dropped_tallies"] += 1
+        else:
+            stats["lagged"] += 1
+
+
+class QuizRoom:
+    """One shared quiz batch, played question by question by every subscriber.
+
+    The host advances the room; each question, tally and result is
+    serialized once and the same bytes are queued for every listener. Answers
+    are counted in memory, and tallies are published at most once per
+    `tally_interval` however fast answers arrive.
+    """
+
+    def __init__(self, room_id, questions, queue_size=32, tally_interval=0.5):
+        self.id = room_id
+        self.host_token = secrets.token_urlsafe(16)
+        self.questions = questions
+        self.queue_size = queue_size
+        self.tally_interval = tally_interval
+        self.index = -1  # Nothing asked yet
+        self.accepting = False
+        self.finished = False
+        self.participants = {}  # participant ID -> display name
+        self.scores = Counter()
+        self.tallies = []  # One Counter of chosen options per question asked
+        self._answered = []  # One set of participant IDs per question asked
+        self._lock = threading.Lock()
+        self._event_id = 0
+        self._replay = []  # Events a new subscriber is sent first: the current question and its results
+        self._thread_subscribers = set()
+        self._loop_subscribers = {}  # event loop -> set of its AsyncSubscribers
+        self._tally_timer = None
+        self.last_active = time.monotonic()
+        self.stats = {"events": 0, "deliveries": 0, "dropped_tallies": 0, "lagged": 0}
+
+    def subscriber_count(self):
+        return len(self._thread_subscribers) + sum(len(s) for s in self._loop_subscribers.values())
+
+    def subscribe(self, subscriber):
+        """Adds a listener and queues the current state for it. Call from the subscriber's own loop."""
+        with self._lock:
+            if subscriber.loop is None:
+                self._thread_subscribers.add(subscriber)
+            else:
+                self._loop_subscribers.setdefault(subscriber.loop, set()).add(subscriber)
+            _deliver([subscriber], format_event(self._event_id, "state", self._state()), False, self.stats)
+            if self._replay:
+                _deliver([subscriber], b"".join(self._replay), False, self.stats)
+            self.last_active = time.monotonic()
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber.loop is None:
+                self._thread_subscribers.discard(subscriber)
+            else:
+                subscribers = self._loop_subscribers.get(subscriber.loop)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._loop_subscribers[subscriber.loop]
+
+    def join(self, name):
+        """Registers a participant and returns their ID, which answers must carry."""
+        participant_id = secrets.token_urlsafe(9)
+        with self._lock:
+            self.participants[participant_id] = (name or "Player").strip()[:40] or "Player"
+            self.last_active = time.monotonic()
+        return participant_id
+
+    def advance(self):
+        """Closes the current question with its results and asks the next one, or ends the room."""
+        with self._lock:
+            if self.finished:
+                return False
+            self._close_question()
+            self.index += 1
+            if self.index >= len(self.questions):
+                self.finished = True
+                self._replay = [self._publish("end", {"scores": self._leaderboard()})]
+                return False
+            self.tallies.append(Counter())
+            self._answered.append(set())
+            self.accepting = True
+            question = {k: v for k, v in self.questions[self.index].items() if k != "answer"}
+            self._replay = [self._publish("question", {
+                "index": self.index, "total": len(self.questions), "question": question,
+                "published_at": time.time()})]
+            return True
+
+    def reveal(self):
+        """Stops taking answers for the current question and publishes its results."""
+        with self._lock:
+            self._close_question()
+
+    def answer(self, participant_id, index, answer):
+        """Counts one answer. Returns (ok, error message)."""
+        with self._lock:
+            if participant_id not in self.participants:
+                return False, "Unknown participant. Join the room first."
+            if index != self.index or not self.accepting:
+                return False, "That question is closed."
+            if participant_id in self._answered[index]:
+                return False, "You already answered this question."
+            if answer not in self.questions[index].get("options", ()):
+                return False, "That is not one of the options."
+            self._answered[index].add(participant_id)
+            self.tallies[index][answer] += 1
+            if answer == self.questions[index].get("answer"):
+                self.scores[participant_id] += 1
+            self.last_active = time.monotonic()
+            if self._tally_timer is None:
+                self._tally_timer = threading.Timer(self.tally_interval, self._publish_tally)
+                self._tally_timer.daemon = True
+                self._tally_timer.start()
+            return True, None
+
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def close(self):
+        """Ends every subscription, e.g. when the room is evicted."""
+        with self._lock:
+            if self._tally_timer is not None:
+                self._tally_timer.cancel()
+            for subscriber in list(self._thread_subscribers):
+                subscriber.close()
+            for loop, subscribers in self._loop_subscribers.items():
+                for subscriber in subscribers:
+                    _call_on_loop(loop, subscriber.close)
+            self._thread_subscribers.clear()
+            self._loop_subscribers.clear()
+
+    def _state(self):
+        state = {
+            "room_id": self.id, "index": self.index, "total": len(self.questions),
+            "accepting": self.accepting, "finished": self.finished,
+            "participants": len(self.participants), "listeners": self.subscriber_count(),
+        }
+        if 0 <= self.index < len(self.tallies):
+            state["tally"] = dict(self.tallies[self.index])
+            state["answered"] = len(self._answered[self.index])
+        return state
+
+    def _publish_tally(self):
+        with self._lock:
+            self._tally_timer = None
+            if self.accepting:
+                self._publish("tally", {"index": self.index, "tally": dict(self.tallies[self.index]),
+                                        "answered": len(self._answered[self.index]),
+                                        "participants": len(self.participants)}, droppable=True)
+
+    def _close_question(self):
+        if not self.accepting:
+            return
+        self.accepting = False
+        tally = self.tallies[self.index]
+        correct_answer = self.questions[self.index].get("answer")
+        self._replay.append(self._publish("results", {
+            "index": self.index, "answer": correct_answer, "tally": dict(tally),
+            "answered": len(self._answered[self.index]), "correct": tally.get(correct_answer, 0),
+            "scores": self._leaderboard()}))
+
+    def _leaderboard(self, limit=10):
+        return [{"name": self.participants[pid], "score": score} for pid, score in self.scores.most_common(limit)]
+
+    def _publish(self, event, data, droppable=False):
+        """Serializes an event once and hands it to every subscriber. Caller holds the lock."""
+        self._event_id += 1
+        payload = format_event(self._event_id, event, data)
+        self.stats["events"] += 1
+        _deliver(list(self._thread_subscribers), payload, droppable, self.stats)
+        for loop, subscribers in list(self._loop_subscribers.items()):
+            if not _call_on_loop(loop, _deliver, list(subscribers), payload, droppable, self.stats):
+                del self._loop_subscribers[loop]
+        self.last_active = time.monotonic()
+        return payload
+
+
+def handle_answer(room, data):
+    """Validates an answer request body and counts it. Returns (status code, response body).
+
+    Shared by the Flask view and the ASGI fast path, which answers without a
+    trip through the thread pool since a whole room answers at once.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("index"), int) or not isinstance(data.get("answer"), str):
+        return 400, {"success": False, "error": "An integer index and a string answer are required."}
+    ok, error = room.answer(data.get("participant_id"), data["index"], data["answer"])
+    if not ok:
+        return 409, {"success": False, "error": error}
+    return 200, {"success": True}
+
+
+def _call_on_loop(loop, func, *args):
+    try:
+        loop.call_soon_threadsafe(func, *args)
+        return True
+    except RuntimeError:  # The loop has shut down
+        return False
+
+
+class QuizRooms:
+    """In-process registry of quiz rooms.
+
+    Rooms live in the worker that created them, so every participant must
+    reach that worker (run rooms with one worker, or route by room ID). Rooms
+    idle for `idle_ttl` seconds are closed when a new room is created.
+    """
+
+    def __init__(self, max_rooms=100, idle_ttl=3 * 3600, queue_size=32, tally_interval=0.5):
+        self.max_rooms = max_rooms
+        self.idle_ttl = idle_ttl
+        self.queue_size = queue_size
+        self.tally_interval = tally_interval
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def create(self, questions):
+        """Returns a new room for `questions`, or None if the worker already holds `max_rooms` active rooms."""
+        now = time.monotonic()
+        with self._lock:
+            for room_id, room in list(self._rooms.items()):
+                if now - room.last_active > self.idle_ttl:
+                    del self._rooms[room_id]
+                    room.close()
+            if len(self._rooms) >= self.max_rooms:
+                return None
+            room = QuizRoom(secrets.token_urlsafe(6), questions, self.queue_size, self.tally_interval)
+            self._rooms[room.id] = room
+            return room
+
+    def get(self, room_id):
+        return self._rooms.get(room_id)
+
+    def stats(self):
+        with self._lock:
+            rooms = list(self._rooms.values())
+        stats = {"rooms": len(rooms), "listeners": sum(r.subscriber_count() for r in rooms)}
+        for key in ("events", "deliveries", "dropped_tallies", "lagged"):
+            stats[key] = sum(r.stats[key] for r in rooms)
+        return stats
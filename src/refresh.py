@@ -0,0 +1,72 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class RefreshJob:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "running"
+        self.started_at = time.time()
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class RefreshManager:
+    """Runs the data refresh pipeline on a background thread.
+
+    Only one refresh runs at a time per process: a request that arrives while
+    one is in flight is handed the running job instead of starting another.
+    Job records are kept in memory, so status polling must reach the same
+    worker that started the job.
+    """
+
+    def __init__(self, pipeline, on_success=None, keep_jobs=20):
+        self.pipeline = pipeline
+        self.on_success = on_success
+        self.keep_jobs = keep_jobs
+        self._jobs = OrderedDict()
+        self._current = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts a refresh, or joins the one in progress. Returns (job, started)."""
+        with self._lock:
+            if self._current is not None:
+                return self._current, False
+            job = self._current = RefreshJob()
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep_jobs:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job,), name=f"refresh-{job.id}", daemon=True).start()
+        return job, True
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job):
+        try:
+            job.result = self.pipeline()
+            if self.on_success:
+                self.on_success(job.result)
+            job.status = "succeeded"
+        except Exception as e:
+            print(f"Error running data refresh: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._current = None
@@ -0,0 +1,63 @@
+from datetime import date
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, or_
+
+from src.models.archive import ArchiveItem, ArchiveSnapshot
+
+archive_bp = Blueprint('archive', __name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+@archive_bp.route('/archive/snapshots', methods=['GET'])
+def list_snapshots():
+    limit = max(1, min(request.args.get('limit', 20, type=int), MAX_PAGE_SIZE))
+    snapshots = ArchiveSnapshot.query.order_by(ArchiveSnapshot.created_at.desc()).limit(limit).all()
+    return jsonify({'success': True, 'snapshots': [s.to_dict() for s in snapshots]})
+
+
+@archive_bp.route('/archive/<sections>', methods=['GET'])
+def query_archive(sections):
+    """Items of one or more comma-separated sections dated between start and end (inclusive)."""
+    try:
+        start = _parse_date(request.args.get('start'))
+        end = _parse_date(request.args.get('end'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD.'}), 400
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+    section_list = [s for s in sections.split(',') if s]
+    query = ArchiveItem.query.filter(ArchiveItem.section.in_(section_list))
+    if start:
+        query = query.filter(ArchiveItem.item_date >= start)
+    if end:
+        query = query.filter(ArchiveItem.item_date <= end)
+
+    # Keyset pagination on (item_date, id), which the section/date index covers
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_date, cursor_id = cursor.split(':')
+            cursor_date, cursor_id = date.fromisoformat(cursor_date), int(cursor_id)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor.'}), 400
+        query = query.filter(or_(ArchiveItem.item_date > cursor_date,
+                                 and_(ArchiveItem.item_date == cursor_date, ArchiveItem.id > cursor_id)))
+
+    items = query.order_by(ArchiveItem.item_date, ArchiveItem.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = f'{items[-1].item_date.isoformat()}:{items[-1].id}'
+    return jsonify({
+        'success': True,
+        'sections': section_list,
+        'items': [item.to_dict() for item in items],
+        'next_cursor': next_cursor
+    })
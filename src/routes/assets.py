@@ -0,0 +1,19 @@
+import os
+
+from flask import Blueprint, abort, current_app, send_from_directory
+
+assets_bp = Blueprint('assets', __name__)
+
+# Asset names change whenever their content does, so a cached copy never goes stale
+ONE_YEAR = 365 * 24 * 3600
+
+
+@assets_bp.route('/assets/<path:filename>', methods=['GET'])
+def serve_asset(filename):
+    if filename == 'manifest.json':  # not fingerprinted, so never immutable
+        abort(404)
+    response = send_from_directory(os.path.join(current_app.static_folder, 'assets'), filename,
+                                   max_age=ONE_YEAR, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
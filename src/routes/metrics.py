@@ -0,0 +1,9 @@
+from flask import Blueprint, Response, current_app
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    registry = current_app.extensions['metrics']
+    return Response(registry.render(), mimetype='text/plain', content_type='text/plain; version=0.0.4; charset=utf-8')
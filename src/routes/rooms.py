@@ -0,0 +1,89 @@
+import secrets
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from src.quiz_rooms import SSE_HEADERS, ThreadSubscriber, handle_answer
+
+rooms_bp = Blueprint('rooms', __name__)
+
+# Rooms are created from the host's quiz batch by POST /api/rooms in main.py.
+# Under the ASGI entry point, /api/rooms/<id>/events and /answer are served by
+# src/asgi.py on the event loop; the streaming view below holds a worker
+# thread per listener and is only meant for the development server.
+
+
+def _get_room(room_id):
+    return current_app.extensions['quiz_rooms'].get(room_id)
+
+
+def _is_host(room, data):
+    return secrets.compare_digest(str(data.get('host_token', '')), room.host_token)
+
+
+@rooms_bp.route('/rooms/<room_id>', methods=['GET'])
+def room_state(room_id):
+    room = _get_room(room_id)
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room not found.'}), 404
+    return jsonify(dict(room.state(), success=True))
+
+
+@rooms_bp.route('/rooms/<room_id>/join', methods=['POST'])
+def join_room(room_id):
+    room = _get_room(room_id)
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room not found.'}), 404
+    data = request.get_json(silent=True) or {}
+    participant_id = room.join(str(data.get('name', '')))
+    return jsonify({'success': True, 'participant_id': participant_id, 'state': room.state()})
+
+
+@rooms_bp.route('/rooms/<room_id>/next', methods=['POST'])
+def next_room_question(room_id):
+    """Host only: publishes the current question's results, then the next question (or the end)."""
+    room = _get_room(room_id)
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room not found.'}), 404
+    if not _is_host(room, request.get_json(silent=True) or {}):
+        return jsonify({'success': False, 'error': 'Only the host can advance the room.'}), 403
+    room.advance()
+    return jsonify(dict(room.state(), success=True))
+
+
+@rooms_bp.route('/rooms/<room_id>/reveal', methods=['POST'])
+def reveal_room_answer(room_id):
+    """Host only: closes the current question and publishes its results."""
+    room = _get_room(room_id)
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room not found.'}), 404
+    if not _is_host(room, request.get_json(silent=True) or {}):
+        return jsonify({'success': False, 'error': 'Only the host can reveal answers.'}), 403
+    room.reveal()
+    return jsonify(dict(room.state(), success=True))
+
+
+@rooms_bp.route('/rooms/<room_id>/answer', methods=['POST'])
+def answer_room_question(room_id):
+    """Body: {"participant_id": ..., "index": ..., "answer": ...}. Correctness is published with the results."""
+    room = _get_room(room_id)
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room not found.'}), 404
+    status, body = handle_answer(room, request.get_json(silent=True) or {})
+    return jsonify(body), status
+
+
+@rooms_bp.route('/rooms/<room_id>/events', methods=['GET'])
+def room_events(room_id):
+    room = _get_room(room_id)
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room not found.'}), 404
+    subscriber = ThreadSubscriber(room.queue_size)
+    room.subscribe(subscriber)
+
+    def stream():
+        try:
+            yield from subscriber.events()
+        finally:
+            room.unsubscribe(subscriber)
+
+    return Response(stream_with_context(stream()), headers=SSE_HEADERS)
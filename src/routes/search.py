@@ -0,0 +1,26 @@
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+
+search_bp = Blueprint('search', __name__)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+@search_bp.route('/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing search query (q).'}), 400
+    limit = max(1, min(request.args.get('limit', DEFAULT_LIMIT, type=int), MAX_LIMIT))
+    sources = {s for s in request.args.get('sources', '').split(',') if s} or None
+
+    started = time.perf_counter()
+    results = current_app.extensions['search'].search(query, limit=limit, sources=sources)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
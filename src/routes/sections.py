@@ -0,0 +1,68 @@
+import zlib
+
+from flask import Blueprint, current_app, jsonify, request
+
+from src.snapshot import is_section
+
+sections_bp = Blueprint('sections', __name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Scalar values that travel with a section's pages
+SECTION_META = {'movies': ['movie_source_info']}
+
+
+def _snapshot():
+    return current_app.extensions['trivia_data_store'].get()
+
+
+def _project(record, fields):
+    if not fields or not isinstance(record, dict):
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def _cached_json(payload, snapshot, max_age=60):
+    response = jsonify(payload)
+    # The snapshot version changes whenever the data does, so it makes a strong
+    # validator; the query string is part of the cache key already.
+    response.set_etag(f"{snapshot.version}-{zlib.crc32(request.query_string):08x}")
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+
+@sections_bp.route('/sections', methods=['GET'])
+def list_sections():
+    snapshot = _snapshot()
+    sections = {key: len(value) for key, value in snapshot.data.items() if is_section(value)}
+    return _cached_json({'version': snapshot.version, 'sections': sections}, snapshot)
+
+
+@sections_bp.route('/sections/<key>', methods=['GET'])
+def get_section(key):
+    snapshot = _snapshot()
+    items = snapshot.data.get(key)
+    if not is_section(items):
+        return jsonify({'success': False, 'error': f'Unknown section: {key}'}), 404
+
+    cursor = request.args.get('cursor', '0')
+    if not cursor.isdigit():
+        return jsonify({'success': False, 'error': 'Invalid cursor.'}), 400
+    offset = int(cursor)
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+
+    page = items[offset:offset + limit]
+    next_offset = offset + len(page)
+    payload = {
+        'success': True,
+        'section': key,
+        'version': snapshot.version,
+        'total': len(items),
+        'items': [_project(item, fields) for item in page],
+        'next_cursor': str(next_offset) if next_offset < len(items) else None,
+    }
+    for meta_key in SECTION_META.get(key, []):
+        payload[meta_key] = snapshot.data.get(meta_key)
+    return _cached_json(payload, snapshot)
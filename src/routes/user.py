@@ -1,27 +1,114 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.quiz_stats import QuizAnswer, UserCategoryStats
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Bulk requests are capped so one call cannot hold a transaction open for long
+MAX_BULK_USERS = 5000
+# Keeps IN (...) lookups under SQLite's and MySQL's parameter limits
+LOOKUP_CHUNK = 500
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """One page of users ordered by id; pass next_cursor back as ?cursor= for the next page."""
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor', 0, type=int)
+    # Keyset pagination: "id > cursor" stays an index range scan however deep the page
+    users = User.query.filter(User.id > cursor).order_by(User.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = users[-1].id
+    return jsonify({'users': [user.to_dict() for user in users], 'next_cursor': next_cursor})
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
-    
+
     data = request.json
     user = User(username=data['username'], email=data['email'])
     db.session.add(user)
     db.session.commit()
     return jsonify(user.to_dict()), 201
 
+@user_bp.route('/users/bulk', methods=['POST'])
+def bulk_upsert_users():
+    """Creates or updates many users, matched by username, in a single transaction.
+
+    Body: {"users": [{"username": ..., "email": ...}, ...]}. A later entry for
+    the same username wins. Nothing is written if any entry is invalid or an
+    email is already taken by a different user.
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('users')
+    if not isinstance(entries, list):
+        return jsonify({'error': 'Expected a JSON body with a "users" list.'}), 400
+    if len(entries) > MAX_BULK_USERS:
+        return jsonify({'error': f'At most {MAX_BULK_USERS} users per request.'}), 400
+
+    by_username = {}
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get('username') or not entry.get('email') \
+                or not isinstance(entry['username'], str) or not isinstance(entry['email'], str):
+            return jsonify({'error': f'Entry {i} needs a username and an email.'}), 400
+        by_username[entry['username']] = entry['email']
+
+    usernames = list(by_username)
+    existing = {}
+    for start in range(0, len(usernames), LOOKUP_CHUNK):
+        chunk = usernames[start:start + LOOKUP_CHUNK]
+        for user_id, username, email in db.session.query(User.id, User.username, User.email).filter(
+                User.username.in_(chunk)):
+            existing[username] = (user_id, email)
+
+    inserts = [{'username': u, 'email': e} for u, e in by_username.items() if u not in existing]
+    updates = [{'id': existing[u][0], 'email': e} for u, e in by_username.items()
+               if u in existing and existing[u][1] != e]
+    try:
+        if inserts:
+            db.session.execute(insert(User), inserts)
+        if updates:
+            db.session.execute(update(User), updates)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'An email in the request already belongs to another user.'}), 409
+    return jsonify({
+        'created': len(inserts),
+        'updated': len(updates),
+        'unchanged': len(by_username) - len(inserts) - len(updates)
+    }), 200
+
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
     return jsonify(user.to_dict())
 
+@user_bp.route('/users/<int:user_id>/quiz_stats', methods=['GET'])
+def get_user_quiz_stats(user_id):
+    """Per-category accuracy, weakest first. Answers from the last couple of seconds may still be buffered."""
+    User.query.get_or_404(user_id)
+    query = UserCategoryStats.query.filter_by(user_id=user_id)
+    category = request.args.get('category')
+    if category:
+        query = query.filter_by(category=category)
+    stats = [s.to_dict() for s in query]
+    stats.sort(key=lambda s: (s['accuracy'], -s['answered']))
+    answered = sum(s['answered'] for s in stats)
+    correct = sum(s['correct'] for s in stats)
+    return jsonify({
+        'user_id': user_id,
+        'answered': answered,
+        'correct': correct,
+        'accuracy': round(correct / answered, 4) if answered else None,
+        'categories': stats
+    })
+
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
     user = User.query.get_or_404(user_id)
@@ -34,6 +121,12 @@ def update_user(user_id):
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
+    recorder = current_app.extensions.get('answer_recorder')
+    if recorder is not None:
+        # Buffered answers would otherwise be flushed after the rows below are gone
+        recorder.forget_user(user_id)
+    UserCategoryStats.query.filter_by(user_id=user_id).delete()
+    QuizAnswer.query.filter_by(user_id=user_id).delete()
     db.session.delete(user)
     db.session.commit()
     return '', 204
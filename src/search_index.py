@@ -0,0 +1,242 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from src.models.question import Question
+from src.models.user import db
+from src.snapshot import is_section, section_digest
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split())
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    return [t for t in _TOKEN_RE.findall(text) if t not in STOPWORDS]
+
+
+class InvertedIndex:
+    """In-memory inverted index with BM25 ranking.
+
+    Documents are grouped by source (a trivia section, the geo quiz, the
+    question bank) so a source can be replaced or appended to without
+    touching the rest of the index. Each document keeps only a small `ref`
+    (a list position or row ID); callers look the content up from it.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._docs = {}
+        self._postings = defaultdict(dict)
+        self._source_docs = defaultdict(set)
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, source, doc_id, text, ref):
+        """Indexes one document; search results return (source, ref, score) for it."""
+        terms = tokenize(text)
+        with self._lock:
+            if doc_id in self._docs:
+                self._remove(doc_id)
+            counts = defaultdict(int)
+            for term in terms:
+                counts[term] += 1
+            for term, tf in counts.items():
+                self._postings[term][doc_id] = tf
+            self._docs[doc_id] = (source, len(terms), list(counts), ref)
+            self._source_docs[source].add(doc_id)
+            self._total_length += len(terms)
+
+    def replace_source(self, source, documents):
+        """Drops every document of `source` and indexes `documents` (doc_id, text, ref) instead."""
+        with self._lock:
+            for doc_id in list(self._source_docs.get(source, ())):
+                self._remove(doc_id)
+            for doc_id, text, ref in documents:
+                self.add(source, doc_id, text, ref)
+
+    def _remove(self, doc_id):
+        source, length, terms, _ = self._docs.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._source_docs[source].discard(doc_id)
+        self._total_length -= length
+
+    def search(self, query, limit=20, sources=None):
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._docs[doc_id][1]
+                    norm = tf + self.K1 * (1 - self.B + self.B * length / avg_length)
+                    scores[doc_id] += idf * tf * (self.K1 + 1) / norm
+            if sources:
+                scores = {d: s for d, s in scores.items() if self._docs[d][0] in sources}
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda pair: pair[1])
+            return [(self._docs[doc_id][0], self._docs[doc_id][3], round(score, 4)) for doc_id, score in ranked]
+
+
+def _item_title(item):
+    if isinstance(item, dict):
+        return item.get("headline") or item.get("title") or ""
+    return str(item)
+
+
+def _section_documents(section, items):
+    # Only positions are kept; hits are decoded from the section when returned
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            text = " ".join(str(v) for k, v in item.items() if isinstance(v, str) and k not in ("url", "iso_date"))
+        else:
+            text = str(item)
+        yield f"{section}:{i}", text, i
+
+
+def _question_item(q):
+    return {"id": f"q_{q.id}", "question": q.question, "answer": q.correct_answer,
+            "category": q.category, "difficulty": q.difficulty}
+
+
+class SearchService:
+    """Keeps an InvertedIndex in sync with the trivia data, geo quiz file and question bank.
+
+    Syncing is incremental and cheap enough to run before each search: a
+    trivia section is re-indexed only if its content hash changed, the geo
+    quiz only if its mtime moved, and the question bank only for rows with
+    an id above the last one indexed.
+
+    The index holds no content. Hits are read back when a search returns
+    them: trivia records from the data snapshot that was indexed (decoding
+    only those records when it is a binary snapshot), questions from the
+    database.
+    """
+
+    def __init__(self, data_store, geo_quiz_file, question_check_interval=1.0):
+        self.index = InvertedIndex()
+        self.data_store = data_store
+        self.geo_quiz_file = geo_quiz_file
+        self.question_check_interval = question_check_interval
+        self._data_version = None
+        self._trivia_data = {}
+        self._section_hashes = {}
+        self._geo_mtime = None
+        self._geo_questions = []
+        self._last_question_id = 0
+        self._next_question_check = 0.0
+        self._sync_lock = threading.Lock()
+
+    def sync(self):
+        with self._sync_lock:
+            self._sync()
+
+    def search(self, query, limit=20, sources=None):
+        # Searched and resolved under the sync lock, so every ref matches the data it was indexed from
+        with self._sync_lock:
+            self._sync()
+            return self._resolve(self.index.search(query, limit=limit, sources=sources))
+
+    def _sync(self):
+        self._sync_trivia()
+        self._sync_geo()
+        self._sync_questions()
+
+    def _resolve(self, ranked):
+        question_ids = [ref for source, ref, _ in ranked if source == "questions"]
+        questions = {}
+        if question_ids:
+            questions = {q.id: q for q in Question.query.filter(Question.id.in_(question_ids))}
+        results = []
+        for source, ref, score in ranked:
+            if source == "questions":
+                q = questions.get(ref)
+                if q is None:
+                    continue  # deleted since it was indexed
+                title, item = q.question, _question_item(q)
+            elif source == "geo_quiz":
+                item = self._geo_questions[ref]
+                title = item.get("question", "")
+            else:
+                item = self._trivia_data[source][ref]
+                title = _item_title(item)
+            results.append({"source": source, "score": score, "title": title, "item": item})
+        return results
+
+    def _sync_trivia(self):
+        snapshot = self.data_store.get()
+        if snapshot.version == self._data_version:
+            return
+        sections = {k: v for k, v in snapshot.data.items() if is_section(v)}
+        for section, items in sections.items():
+            # Snapshot sections carry their digest, so unchanged ones are not decoded
+            digest = getattr(items, "digest", None) or section_digest(items)
+            if self._section_hashes.get(section) != digest:
+                self.index.replace_source(section, _section_documents(section, items))
+                self._section_hashes[section] = digest
+        for section in set(self._section_hashes) - set(sections):
+            self.index.replace_source(section, [])
+            del self._section_hashes[section]
+        # Unchanged sections hold the same records in the new snapshot, so their refs stay valid
+        self._trivia_data = snapshot.data
+        self._data_version = snapshot.version
+
+    def _sync_geo(self):
+        try:
+            mtime = os.path.getmtime(self.geo_quiz_file)
+        except OSError:
+            return
+        if mtime == self._geo_mtime:
+            return
+        try:
+            with open(self.geo_quiz_file, "r", encoding="utf-8") as f:
+                questions = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error indexing {self.geo_quiz_file}: {e}")
+            return
+        self.index.replace_source("geo_quiz", (
+            (f"geo_quiz:{q.get('id', i)}",
+             " ".join([q.get("question", ""), q.get("answer", "")] + q.get("options", [])),
+             i)
+            for i, q in enumerate(questions)))
+        self._geo_questions = questions
+        self._geo_mtime = mtime
+
+    def _sync_questions(self):
+        now = time.monotonic()
+        if now < self._next_question_check:
+            return
+        self._next_question_check = now + self.question_check_interval
+        max_id = db.session.query(func.max(Question.id)).scalar() or 0
+        if max_id <= self._last_question_id:
+            return
+        new_questions = (Question.query.filter(Question.id > self._last_question_id)
+                         .order_by(Question.id).yield_per(500))
+        for q in new_questions:
+            self.index.add("questions", f"questions:{q.id}",
+                           " ".join([q.question, q.correct_answer, q.category or ""]), q.id)
+            self._last_question_id = q.id
@@ -0,0 +1,426 @@
+"""Compact binary snapshot of trivia_data.json, read through mmap.
+
+process_data.py writes trivia_data.bin next to the JSON file. Workers map the
+file read-only, so its pages sit once in the OS page cache however many
+workers there are, and records are only decoded when a section or page is
+asked for. The file is written front to back in one pass, so the writer
+never holds a whole section. Layout (little-endian):
+
+    header     magic, format version, section count, JSON version,
+               string table offset, directory offset, file size,
+               sha1 of everything after the header
+    sections   per list section: the records, then one u64 offset per
+               record; scalar sections are a single encoded value
+    strings    count, offsets, UTF-8 bytes; each interned string once
+    directory  per section: name, kind, record count, record index offset,
+               data offset, section_digest()
+
+Values are tagged: null, false, true, int64, float64, string (an ID in the
+string table, or inline), list and object (keys are string IDs). Anything
+else (e.g. ints beyond 64 bits) is stored inline as its JSON text.
+"""
+import hashlib
+import io
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+
+MAGIC = b"TRIVSNAP"
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct("<8sII16sQQQ20s")
+_ENTRY = struct.Struct("<IB3xIQQ20s")
+_U32 = struct.Struct("<I")
+_U32_PAIR = struct.Struct("<II")
+_U64 = struct.Struct("<Q")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+KIND_LIST, KIND_SCALAR = 0, 1
+T_NULL, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_LIST, T_DICT, T_JSON, T_STR_INLINE = range(10)
+# Strings up to this length go in the string table, until it holds MAX_INTERNED
+MAX_INTERNED_LENGTH = 32
+MAX_INTERNED = 4096
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot this version can read."""
+
+
+class VersionHasher:
+    """Builds the version DataStore gives a data file (the first 16 hex digits of its sha1) piece by piece."""
+
+    def __init__(self):
+        self._sha1 = hashlib.sha1()
+
+    def update(self, data):
+        self._sha1.update(data)
+
+    def version(self):
+        return self._sha1.hexdigest()[:16]
+
+
+def content_version(raw):
+    hasher = VersionHasher()
+    hasher.update(raw)
+    return hasher.version()
+
+
+def file_version(path):
+    """content_version() of a file, hashed in chunks instead of read whole."""
+    hasher = VersionHasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            hasher.update(chunk)
+    return hasher.version()
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True).encode("utf-8")
+
+
+def _is_record_stream(value):
+    """Lists and iterators become list sections; anything else is a single value."""
+    return isinstance(value, (list, tuple)) or isinstance(value, Iterator)
+
+
+def section_digest(items):
+    """sha1 of a section's records in canonical JSON, one per line; the same for parsed and snapshot data."""
+    digest = hashlib.sha1()
+    if not _is_record_stream(items) and not isinstance(items, Section):
+        digest.update(_canonical(items))
+        return digest.hexdigest()
+    for record in items:
+        digest.update(_canonical(record) + b"\n")
+    return digest.hexdigest()
+
+
+# --- Writing ---
+
+class _Encoder:
+    """Encodes values; short strings go in the shared string table, the rest inline.
+
+    Interning is capped, so the table (the only part of a snapshot held in
+    memory while writing) stays small however large the data grows.
+    """
+
+    def __init__(self):
+        self.strings = {}
+
+    def string_id(self, value):
+        sid = self.strings.get(value)
+        if sid is None:
+            sid = self.strings[value] = len(self.strings)
+        return sid
+
+    def encode(self, value, out):
+        if value is None:
+            out.append(T_NULL)
+        elif value is True:
+            out.append(T_TRUE)
+        elif value is False:
+            out.append(T_FALSE)
+        elif isinstance(value, int) and _INT64_MIN <= value <= _INT64_MAX:
+            out.append(T_INT)
+            out += _I64.pack(value)
+        elif isinstance(value, float):
+            out.append(T_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            if len(value) <= MAX_INTERNED_LENGTH and (value in self.strings or len(self.strings) < MAX_INTERNED):
+                out.append(T_STR)
+                out += _U32.pack(self.string_id(value))
+            else:
+                self._inline(T_STR_INLINE, value, out)
+        elif isinstance(value, (list, tuple)):
+            out.append(T_LIST)
+            out += _U32.pack(len(value))
+            for item in value:
+                self.encode(item, out)
+        elif isinstance(value, dict) and all(isinstance(k, str) for k in value):
+            out.append(T_DICT)
+            out += _U32.pack(len(value))
+            for key, item in value.items():
+                # Keys repeat in every record, so they are always interned
+                out += _U32.pack(self.string_id(key))
+                self.encode(item, out)
+        else:
+            self._inline(T_JSON, json.dumps(value), out)
+
+    def _inline(self, tag, text, out):
+        data = text.encode("utf-8")
+        out.append(tag)
+        out += _U32.pack(len(data))
+        out += data
+
+    def string_table(self):
+        data = [s.encode("utf-8") for s in self.strings]
+        offsets = [0]
+        for s in data:
+            offsets.append(offsets[-1] + len(s))
+        if offsets[-1] > 0xFFFFFFFF:
+            raise SnapshotError("String table exceeds 4 GiB")
+        return _U32.pack(len(data)) + struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(data)
+
+
+class _BodyWriter:
+    """Writes the part of the file after the header, tracking its position and sha1."""
+
+    def __init__(self, f):
+        self.f = f
+        self.position = _HEADER.size
+        self.sha1 = hashlib.sha1()
+
+    def write(self, data):
+        self.f.write(data)
+        self.sha1.update(data)
+        self.position += len(data)
+
+
+def dump_snapshot(f, sections, source_version):
+    """Streams a snapshot of `sections`, an iterable of (name, value) pairs, to the binary file `f`.
+
+    List values may be iterators; each record is encoded and written as it
+    arrives, so memory holds one record, the record offsets of the current
+    section and the string table. `f` must be seekable: the header is written
+    last. `source_version` is the content_version() of the JSON file written
+    from the same data; readers use it to tell whether the two still match.
+    """
+    f.write(bytes(_HEADER.size))
+    out = _BodyWriter(f)
+    encoder = _Encoder()
+    entries = []
+    for name, value in sections:
+        name_id = encoder.string_id(name)
+        digest = hashlib.sha1()
+        data_offset = out.position
+        if _is_record_stream(value):
+            offsets = array("Q")
+            for record in value:
+                digest.update(_canonical(record) + b"\n")
+                offsets.append(out.position)
+                data = bytearray()
+                encoder.encode(record, data)
+                out.write(data)
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            index_offset = out.position
+            out.write(offsets.tobytes())
+            entries.append((name_id, KIND_LIST, len(offsets), index_offset, data_offset, digest.digest()))
+        else:
+            digest.update(_canonical(value))
+            data = bytearray()
+            encoder.encode(value, data)
+            out.write(data)
+            entries.append((name_id, KIND_SCALAR, 0, data_offset, data_offset, digest.digest()))
+
+    string_table_offset = out.position
+    out.write(encoder.string_table())
+    directory_offset = out.position
+    out.write(b"".join(_ENTRY.pack(*entry) for entry in entries))
+    f.seek(0)
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), (source_version or "").encode("ascii"),
+                         string_table_offset, directory_offset, out.position, out.sha1.digest()))
+    f.seek(out.position)
+
+
+def encode_snapshot(sections, source_version):
+    """Returns the snapshot bytes for `sections`; see dump_snapshot()."""
+    f = io.BytesIO()
+    dump_snapshot(f, sections, source_version)
+    return f.getvalue()
+
+
+# --- Reading ---
+
+class Section(Sequence):
+    """A list section of a snapshot; records are decoded on access, never cached."""
+
+    __slots__ = ("name", "digest", "_snapshot", "_count", "_index_offset")
+
+    def __init__(self, snapshot, name, count, index_offset, digest):
+        self._snapshot = snapshot
+        self.name = name
+        self._count = count
+        self._index_offset = index_offset
+        self.digest = digest
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._record(j) for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("section index out of range")
+        return self._record(i)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._record(i)
+
+    def __repr__(self):
+        return f"<Section {self.name!r} ({self._count} records)>"
+
+    def _record(self, i):
+        offset, = _U64.unpack_from(self._snapshot._mm, self._index_offset + _U64.size * i)
+        return self._snapshot._decode_value(offset)
+
+
+class BinarySnapshot(Mapping):
+    """Read-only mapping of section name to a lazy Section (list sections) or a decoded value.
+
+    Only the header and directory are read up front, and every offset in
+    them is checked against the file; verify() also checks the content. The
+    mapping is closed when it is garbage collected, so requests still
+    holding an old snapshot keep working after a refresh replaces the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # empty file
+                raise SnapshotError(f"{path} is empty") from e
+        size = len(self._mm)
+        if size < _HEADER.size:
+            raise SnapshotError(f"{path} is truncated")
+        (magic, version, count, source_version, self._strings_offset, directory_offset, file_size,
+         self._body_sha1) = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError(f"{path} is not a version {FORMAT_VERSION} trivia snapshot")
+        if file_size != size:
+            raise SnapshotError(f"{path} is {size} bytes, expected {file_size}")
+        try:
+            self.source_version = source_version.rstrip(b"\0").decode("ascii") or None
+        except UnicodeDecodeError as e:
+            raise SnapshotError(f"Bad JSON version in {path}") from e
+
+        self._check_range(directory_offset, _ENTRY.size * count, "directory")
+        self._check_range(self._strings_offset, _U32.size, "string table")
+        self._string_count, = _U32.unpack_from(self._mm, self._strings_offset)
+        self._check_range(self._strings_offset + _U32.size, _U32.size * (self._string_count + 1), "string offsets")
+        self._string_data = self._strings_offset + _U32.size * (self._string_count + 2)
+        string_end, = _U32.unpack_from(self._mm, self._string_data - _U32.size)
+        self._check_range(self._string_data, string_end, "strings")
+
+        self._keys = {}  # Object keys repeat in every record, so their decoded strings are kept
+        self._sections = {}
+        for i in range(count):
+            name_id, kind, n, index_offset, data_offset, digest = _ENTRY.unpack_from(
+                self._mm, directory_offset + _ENTRY.size * i)
+            name = self._string(name_id)
+            if kind == KIND_LIST:
+                self._check_range(index_offset, _U64.size * n, f"section {name!r} index")
+            elif kind != KIND_SCALAR:
+                raise SnapshotError(f"Bad kind {kind} for section {name!r} in {path}")
+            self._check_range(data_offset, 0 if kind == KIND_LIST else 1, f"section {name!r}")
+            self._sections[name] = (kind, n, index_offset, data_offset, digest.hex())
+
+    def _check_range(self, offset, length, what):
+        if offset < _HEADER.size or offset + length > len(self._mm):
+            raise SnapshotError(f"{what} of {self.path} lies outside the file")
+
+    def verify(self):
+        """Checks the content against the sha1 in the header; raises SnapshotError on a mismatch."""
+        with memoryview(self._mm) as view, view[_HEADER.size:] as body:
+            digest = hashlib.sha1(body).digest()
+        if digest != self._body_sha1:
+            raise SnapshotError(f"{self.path} is corrupt (checksum mismatch)")
+
+    def __getitem__(self, name):
+        kind, count, index_offset, data_offset, digest = self._sections[name]
+        if kind == KIND_LIST:
+            return Section(self, name, count, index_offset, digest)
+        return self._decode_value(data_offset)
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self):
+        return len(self._sections)
+
+    def digest(self, name):
+        """section_digest() of a section, read from the directory."""
+        return self._sections[name][4]
+
+    def _string(self, sid):
+        if not 0 <= sid < self._string_count:
+            raise SnapshotError(f"Bad string ID {sid} in {self.path}")
+        start, end = _U32_PAIR.unpack_from(self._mm, self._strings_offset + _U32.size * (sid + 1))
+        if not start <= end <= len(self._mm) - self._string_data:
+            raise SnapshotError(f"Bad offsets for string {sid} in {self.path}")
+        try:
+            return self._mm[self._string_data + start:self._string_data + end].decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise SnapshotError(f"Bad UTF-8 in string {sid} of {self.path}") from e
+
+    def _key(self, sid):
+        key = self._keys.get(sid)
+        if key is None:
+            key = self._keys[sid] = self._string(sid)
+        return key
+
+    def _decode_value(self, pos):
+        """Decodes the value at `pos`, raising SnapshotError for anything that runs off the data."""
+        try:
+            return self._decode(pos)[0]
+        except SnapshotError:
+            raise
+        except (struct.error, IndexError, ValueError) as e:
+            raise SnapshotError(f"Bad value at offset {pos} in {self.path}: {e}") from e
+
+    def _decode(self, pos):
+        """Decodes the value at `pos`; returns (value, position after it)."""
+        mm = self._mm
+        tag = mm[pos]
+        pos += 1
+        if tag == T_STR:
+            sid, = _U32.unpack_from(mm, pos)
+            return self._string(sid), pos + 4
+        if tag == T_DICT:
+            n, = _U32.unpack_from(mm, pos)
+            pos += 4
+            value = {}
+            for _ in range(n):
+                sid, = _U32.unpack_from(mm, pos)
+                value[self._key(sid)], pos = self._decode(pos + 4)
+            return value, pos
+        if tag == T_LIST:
+            n, = _U32.unpack_from(mm, pos)
+            pos += 4
+            value = []
+            for _ in range(n):
+                item, pos = self._decode(pos)
+                value.append(item)
+            return value, pos
+        if tag == T_INT:
+            return _I64.unpack_from(mm, pos)[0], pos + 8
+        if tag == T_FLOAT:
+            return _F64.unpack_from(mm, pos)[0], pos + 8
+        if tag == T_NULL:
+            return None, pos
+        if tag == T_TRUE:
+            return True, pos
+        if tag == T_FALSE:
+            return False, pos
+        if tag == T_STR_INLINE or tag == T_JSON:
+            n, = _U32.unpack_from(mm, pos)
+            end = pos + 4 + n
+            if end > len(mm):
+                raise SnapshotError(f"Value at offset {pos - 1} runs past the end of {self.path}")
+            text = mm[pos + 4:end].decode("utf-8")
+            return (text if tag == T_STR_INLINE else json.loads(text)), end
+        raise SnapshotError(f"Bad value tag {tag} at offset {pos - 1} in {self.path}")
+
+
+def is_section(value):
+    """True for a list section, whether parsed from JSON or a lazy snapshot Section."""
+    return isinstance(value, (list, Section))
@@ -0,0 +1,59 @@
+from flask import Flask
+
+from src.answer_recorder import AnswerRecorder
+from src.models.quiz_stats import QuizAnswer, UserCategoryStats
+from src.models.user import User, db
+from src.routes.user import user_bp
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    app.register_blueprint(user_bp, url_prefix="/api")
+    recorder = AnswerRecorder(flush_interval=60)
+    recorder.init_app(app, enabled=False)  # flushed by hand below
+    app.extensions["answer_recorder"] = recorder
+    with app.app_context():
+        db.create_all()
+    return app, recorder
+
+
+def test_deleted_user_answers_are_not_flushed():
+    app, recorder = make_app()
+    client = app.test_client()
+    user_id = client.post("/api/users", json={"username": "ann", "email": "ann@example.com"}).get_json()["id"]
+    for i in range(3):
+        recorder.record(user_id, i, "Science", True)
+
+    assert client.delete(f"/api/users/{user_id}").status_code == 204
+    assert recorder.pending() == 0
+    recorder.flush()
+
+    new_id = client.post("/api/users", json={"username": "bob", "email": "bob@example.com"}).get_json()["id"]
+    assert new_id != user_id
+    assert client.get(f"/api/users/{new_id}/quiz_stats").get_json()["answered"] == 0
+    with app.app_context():
+        assert QuizAnswer.query.count() == 0
+        assert UserCategoryStats.query.count() == 0
+
+
+def test_flush_skips_users_deleted_by_another_worker():
+    app, recorder = make_app()
+    with app.app_context():
+        users = [User(username=name, email=f"{name}@example.com") for name in ("ann", "bob")]
+        db.session.add_all(users)
+        db.session.commit()
+        ann, bob = users[0].id, users[1].id
+    recorder.record(ann, 1, "Science", True)
+    recorder.record(bob, 2, "Science", False)
+    # Deleted without forget_user(), as a different worker would
+    with app.app_context():
+        db.session.delete(db.session.get(User, ann))
+        db.session.commit()
+
+    assert recorder.flush() == 1
+    assert recorder.pending() == 0
+    assert recorder.stats["dropped"] == 1
+    with app.app_context():
+        assert [a.user_id for a in QuizAnswer.query] == [bob]
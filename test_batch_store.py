@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from src.batch_store import BatchStore, MemoryBatchStore, RedisBatchStore, SQLiteBatchStore, create_batch_store
+
+QUESTIONS = [{"question": f"Q{i}?", "correct_answer": str(i), "options": [str(i), "x"]} for i in range(5)]
+
+
+def memory_store(tmp_path, ttl):
+    return MemoryBatchStore(ttl=ttl)
+
+
+def sqlite_store(tmp_path, ttl):
+    return SQLiteBatchStore(str(tmp_path / "batches.db"), ttl=ttl)
+
+
+def redis_store(tmp_path, ttl):
+    url = os.environ.get("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("set TEST_REDIS_URL to test the Redis batch store")
+    return RedisBatchStore(url, ttl=ttl)
+
+
+@pytest.fixture(params=[memory_store, sqlite_store, redis_store])
+def make_store(request, tmp_path):
+    return lambda ttl=3600: request.param(tmp_path, ttl)
+
+
+def test_cursor_walks_the_batch_in_stored_order(make_store):
+    store = make_store()
+    batch_id = store.put(QUESTIONS)
+    # What get_quiz_question does with the session cursor
+    seen = [store.get_item(batch_id, cursor) for cursor in range(len(QUESTIONS) + 1)]
+    assert seen == QUESTIONS + [None]
+    assert store.get(batch_id) == QUESTIONS
+
+
+def test_out_of_range_and_unknown_items_are_none(make_store):
+    store = make_store()
+    batch_id = store.put(QUESTIONS)
+    assert store.get_item(batch_id, len(QUESTIONS)) is None
+    assert store.get_item(batch_id, -1) is None
+    assert store.get_item("unknown", 0) is None
+    assert store.get_item(None, 0) is None
+    assert store.get("unknown") is None
+
+
+def test_batches_are_independent(make_store):
+    store = make_store()
+    first, second = store.put(QUESTIONS), store.put(QUESTIONS[::-1])
+    assert first != second
+    assert store.get_item(first, 0) == QUESTIONS[0]
+    assert store.get_item(second, 0) == QUESTIONS[-1]
+
+    store.delete(first)
+    store.delete("unknown")
+    assert store.get(first) is None
+    assert store.get_item(first, 0) is None
+    assert store.get(second) == QUESTIONS[::-1]
+
+
+def test_expired_batches_are_gone(make_store):
+    store = make_store(ttl=-1)
+    batch_id = store.put(QUESTIONS)
+    assert store.get_item(batch_id, 0) is None
+    assert store.get(batch_id) is None
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryBatchStore(max_entries=2)
+    first, second = store.put(QUESTIONS), store.put(QUESTIONS)
+    store.get_item(first, 0)
+    store.put(QUESTIONS)
+    assert store.get(first) == QUESTIONS
+    assert store.get(second) is None
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "batches.db")
+    batch_id = SQLiteBatchStore(path).put(QUESTIONS)
+    assert SQLiteBatchStore(path).get_item(batch_id, 3) == QUESTIONS[3]
+
+
+def test_batch_store_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        BatchStore()
+    assert isinstance(create_batch_store("memory://"), MemoryBatchStore)
+    assert isinstance(create_batch_store(f"sqlite:///{tmp_path / 'b.db'}"), SQLiteBatchStore)
+    with pytest.raises(ValueError):
+        create_batch_store("postgres://localhost/db")
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.opentdb import AsyncOpenTDBClient, OpenTDBClient, OpenTDBRateLimited
+from tools.opentdb_stub import start_in_thread
+
+# Scaled down from OpenTDB's one call per 5 seconds
+WINDOW = 0.3
+# The stub's window starts when a call arrives, a little after the client's
+# slot, so it is kept shorter to leave room for the round trip
+STUB_WINDOW = WINDOW * 0.8
+
+
+@pytest.fixture
+def stub(request):
+    server, url = start_in_thread(**getattr(request, "param", {}))
+    yield server.RequestHandlerClass.state, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("stub", [{"rate_limit": STUB_WINDOW}], indirect=True)
+def test_limiter_spaces_calls(stub):
+    state, url = stub
+    client = OpenTDBClient(url, rate=1 / WINDOW)
+    started = time.monotonic()
+    codes = [client.fetch_questions(5, category=9)["response_code"] for _ in range(3)]
+    assert codes == [0, 0, 0]
+    assert time.monotonic() - started >= 2 * WINDOW * 0.9
+    assert client.stats["rate_limited"] == 0
+    # A caller that can't wait for the next slot is refused without a call
+    with pytest.raises(OpenTDBRateLimited):
+        client.fetch_questions(5, category=9, max_wait=WINDOW / 10)
+    assert state.calls == 3
+
+
+@pytest.mark.parametrize("stub", [{"latency": WINDOW}], indirect=True)
+def test_identical_calls_are_coalesced(stub):
+    state, url = stub
+    client = OpenTDBClient(url, rate=100)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.fetch_questions(10, category=21)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert state.calls == 1
+    assert client.stats["coalesced"] == 4
+    assert all(result is results[0] for result in results)
+
+
+@pytest.mark.parametrize("stub", [{"rate_limit": STUB_WINDOW}], indirect=True)
+def test_rate_limited_call_is_retried_after_a_window(stub):
+    state, url = stub
+    # Two workers on the same IP: the first spends the upstream slot
+    first, second = OpenTDBClient(url, rate=1 / WINDOW), OpenTDBClient(url, rate=1 / WINDOW)
+    assert first.fetch_questions(5)["response_code"] == 0
+    started = time.monotonic()
+    assert second.fetch_questions(5)["response_code"] == 0
+    assert time.monotonic() - started >= WINDOW * 0.9
+    assert second.stats == {"upstream_calls": 2, "coalesced": 0, "category_cache_hits": 0, "rate_limited": 1}
+    assert state.calls == 3
+
+
+@pytest.mark.parametrize("stub", [{"rate_limit": STUB_WINDOW}], indirect=True)
+def test_async_client_retries_the_same_way(stub):
+    state, url = stub
+    first, second = OpenTDBClient(url, rate=1 / WINDOW), OpenTDBClient(url, rate=1 / WINDOW)
+    assert first.fetch_questions(5)["response_code"] == 0
+
+    async def fetch():
+        client = AsyncOpenTDBClient(second)
+        try:
+            return await client.fetch_questions(5)
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(fetch())["response_code"] == 0
+    assert second.stats["rate_limited"] == 1
+    assert second.stats["upstream_calls"] == 2
@@ -0,0 +1,44 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from src.page_cache import PageCache, brotli, page_response
+
+
+class Snapshot:
+    version = "v1"
+    mtime = 0
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    cache = PageCache()
+    app.add_url_rule("/", "index", lambda: page_response(cache.get("index", Snapshot(), lambda: "<p>hi</p>" * 100)))
+    return app.test_client()
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=0, identity", None),
+    ("br;q=0, gzip", "gzip"),
+    ("*;q=0", None),
+])
+def test_encoding_follows_q_values(client, accept, expected):
+    response = client.get("/", headers={"Accept-Encoding": accept})
+    assert response.headers.get("Content-Encoding") == expected
+    body = gzip.decompress(response.data) if expected == "gzip" else response.data
+    assert body == b"<p>hi</p>" * 100
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("gzip;q=0, br", "br"),
+])
+def test_brotli_follows_q_values(client, accept, expected):
+    assert client.get("/", headers={"Accept-Encoding": accept}).headers.get("Content-Encoding") == expected
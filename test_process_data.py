@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+
+import process_data
+from src.snapshot import BinarySnapshot, file_version, is_section
+
+
+def copy_sources(tmp_path):
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    for _, filename, _ in process_data.SOURCE_REGISTRY:
+        shutil.copy(os.path.join(process_data.DEFAULT_STATIC_DIR, filename), static_dir / filename)
+    return str(static_dir)
+
+
+def refresh(tmp_path, static_dir):
+    return process_data.refresh(static_dir, cache_dir=str(tmp_path / "cache"))
+
+
+def expected_data(static_dir):
+    data = {}
+    for _, filename, processor in process_data.SOURCE_REGISTRY:
+        data.update(processor(os.path.join(static_dir, filename), None) or {})
+    return data
+
+
+def test_streamed_refresh_matches_parsed_data(tmp_path):
+    static_dir = copy_sources(tmp_path)
+    result = refresh(tmp_path, static_dir)
+    expected = expected_data(static_dir)
+    with open(result["output_file"], "rb") as f:
+        assert f.read() == json.dumps(expected, indent=2).encode("utf-8")
+    snapshot = BinarySnapshot(result["snapshot_file"])
+    assert snapshot.source_version == file_version(result["output_file"])
+    assert {k: list(v) if is_section(v) else v for k, v in snapshot.items()} == expected
+    # The manifest keeps hashes and counts, not parsed records
+    with open(tmp_path / "cache" / process_data.MANIFEST_FILENAME) as f:
+        manifest = json.load(f)
+    assert manifest["sources"]["movies"]["sections"] == {"movies": len(expected["movies"]), "movie_source_info": None}
+
+
+def test_missing_snapshot_is_rebuilt_from_spill_files(tmp_path):
+    static_dir = copy_sources(tmp_path)
+    result = refresh(tmp_path, static_dir)
+    with open(result["snapshot_file"], "rb") as f:
+        original = f.read()
+    os.remove(result["snapshot_file"])
+
+    again = refresh(tmp_path, static_dir)
+    assert not again["changed"] and not again["parsed"]
+    with open(result["snapshot_file"], "rb") as f:
+        assert f.read() == original
+
+
+def test_failed_source_is_left_out(tmp_path):
+    static_dir = copy_sources(tmp_path)
+    refresh(tmp_path, static_dir)
+    os.remove(os.path.join(static_dir, "music_data.txt"))
+
+    result = refresh(tmp_path, static_dir)
+    assert result["changed"]
+    assert "music" not in result["sections"]
+    with open(result["output_file"]) as f:
+        assert "music" not in json.load(f)
+
+
+def test_cache_is_kept_out_of_the_static_folder(tmp_path):
+    static_dir = copy_sources(tmp_path)
+    refresh(tmp_path, static_dir)
+    sources = {filename for _, filename, _ in process_data.SOURCE_REGISTRY}
+    assert set(os.listdir(static_dir)) - sources == {"trivia_data.json", process_data.SNAPSHOT_FILENAME}
@@ -0,0 +1,100 @@
+from collections import Counter
+
+from flask import Flask
+
+from src.models.question import Question
+from src.models.user import db
+from src.question_bank import QuestionBank
+
+
+def opentdb_question(category, n):
+    return {"type": "multiple", "difficulty": "easy", "category": category,
+            "question": f"{category} question #{n}?", "correct_answer": "A",
+            "incorrect_answers": ["B", "C", "D"]}
+
+
+class FakeOpenTDB:
+    def __init__(self, results, response_code=0):
+        self.results = results
+        self.response_code = response_code
+        self.calls = []
+
+    def fetch_questions(self, amount, category=None, difficulty=None, q_type=None, token=None, max_wait=None):
+        self.calls.append(amount)
+        return {"response_code": self.response_code, "results": self.results[:amount]}
+
+    def request_token(self):
+        return "token"
+
+    def get_categories(self):
+        return [{"id": 9, "name": "General Knowledge"}, {"id": 21, "name": "Sports"}, {"id": 23, "name": "History"}]
+
+
+def make_bank(results=(), response_code=0):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    bank = QuestionBank(FakeOpenTDB(list(results), response_code))
+    bank.init_app(app, enabled=False)
+    with app.app_context():
+        db.create_all()
+    return app, bank
+
+
+def test_any_bucket_is_spread_across_categories():
+    app, bank = make_bank()
+    with app.app_context():
+        bank.store([opentdb_question("Sports", n) for n in range(40)])
+        bank.store([opentdb_question("History", n) for n in range(5)])
+        bank.store([opentdb_question("General Knowledge", n) for n in range(5)])
+
+        assert Counter(q.category for q in bank.take(12)) == {"Sports": 4, "History": 4, "General Knowledge": 4}
+        assert Counter(q.category for q in bank.take(20)) == {"Sports": 10, "History": 5, "General Knowledge": 5}
+        assert len(bank.take(100)) == 50
+
+
+def test_short_bucket_is_topped_up_live():
+    app, bank = make_bank(opentdb_question("Sports", n) for n in range(30, 60))
+    with app.app_context():
+        bank.store([opentdb_question("Sports", n) for n in range(20)], category_id=21)
+        assert len(bank.take(50, 21)) == 20
+        assert bank.should_top_up(20, 50, 21)
+
+        bank.top_up(50, 21)
+        assert bank.client.calls == [50]
+        assert len(bank.take(50, 21)) == 50
+        assert not bank.should_top_up(50, 50, 21)
+
+
+def test_live_top_ups_are_capped_per_bucket():
+    app, bank = make_bank(opentdb_question("Sports", n) for n in range(20, 40))
+    with app.app_context():
+        bank.store([opentdb_question("Sports", n) for n in range(20)], category_id=21)
+        bank.top_up(50, 21)
+        assert Question.query.count() == 40
+        # Still short, but served from the bank until the interval runs out
+        assert not bank.should_top_up(40, 50, 21)
+        assert bank.should_top_up(40, 50, 9)
+        bank._topped_up[(21, None, None)] -= bank.top_up_interval
+        assert bank.should_top_up(40, 50, 21)
+
+
+def test_refill_backs_off_from_a_bucket_opentdb_rejects():
+    app, bank = make_bank(response_code=2)  # Invalid parameter
+    bank.request(21, "easy", "multiple")
+    with app.app_context():
+        calls = 0
+        while bank._refill_once():
+            calls += 1
+            assert calls <= 2
+        # Both the rejected bucket and the always-wanted "any" bucket are backed off
+        assert len(bank.client.calls) == 2
+        assert bank._pick_bucket() is None
+
+
+def test_demand_is_capped():
+    app, bank = make_bank()
+    bank.max_buckets = 3
+    for category in (9, 21, 23):
+        bank.request(category)
+    assert set(bank._demand) == {(None, None, None), (21, None, None), (23, None, None)}
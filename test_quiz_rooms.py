@@ -0,0 +1,124 @@
+import asyncio
+import re
+
+import pytest
+
+from src.quiz_rooms import HEARTBEAT, AsyncSubscriber, QuizRoom, Subscriber, ThreadSubscriber
+
+QUESTIONS = [{"question": f"Q{i}?", "options": ["a", "b"], "answer": "a"} for i in range(5)]
+
+
+def event_names(payloads):
+    return [name.decode() for payload in payloads for name in re.findall(rb"^event: (\w+)$", payload, re.M)]
+
+
+def drain(subscriber):
+    payloads = []
+    while not subscriber._queue.empty():
+        payload = subscriber._queue.get_nowait()
+        if payload is not None:
+            payloads.append(payload)
+    return payloads
+
+
+def make_room(queue_size=32):
+    # Tallies are published by hand below rather than by the timer
+    return QuizRoom("room", QUESTIONS, queue_size=queue_size, tally_interval=60)
+
+
+def test_subscriber_gets_state_then_current_question():
+    room = make_room()
+    room.advance()
+    subscriber = ThreadSubscriber(room.queue_size)
+    room.subscribe(subscriber)
+    assert room.subscriber_count() == 1
+    assert event_names(drain(subscriber)) == ["state", "question"]
+
+    room.reveal()
+    assert event_names(drain(subscriber)) == ["results"]
+
+
+def test_unsubscribed_listener_gets_nothing_more():
+    room = make_room()
+    subscriber = ThreadSubscriber(room.queue_size)
+    room.subscribe(subscriber)
+    drain(subscriber)
+
+    room.unsubscribe(subscriber)
+    room.advance()
+    assert room.subscriber_count() == 0
+    assert drain(subscriber) == []
+    assert room.stats["deliveries"] == 1  # The initial state only
+
+
+def test_listener_that_falls_behind_is_closed():
+    room = make_room(queue_size=3)
+    slow, fast = ThreadSubscriber(room.queue_size), ThreadSubscriber(room.queue_size)
+    room.subscribe(slow)
+    room.subscribe(fast)
+    drain(fast)
+    for _ in range(3):
+        room.advance()
+        drain(fast)
+
+    assert slow.closed and slow.lagged
+    assert not fast.closed
+    assert room.stats["lagged"] == 1
+    # Its reader ends the stream; the browser reconnects and is replayed the state
+    assert list(slow.events(heartbeat=0.01)) == []
+
+
+def test_tallies_are_dropped_for_a_full_queue_without_closing_it():
+    room = make_room(queue_size=2)
+    room.advance()
+    subscriber = ThreadSubscriber(room.queue_size)
+    room.subscribe(subscriber)  # state + question fill the queue
+    participant = room.join("ann")
+    assert room.answer(participant, 0, "a") == (True, None)
+    room._publish_tally()
+
+    assert not subscriber.closed
+    assert room.stats["dropped_tallies"] == 1
+    assert event_names(drain(subscriber)) == ["state", "question"]
+    room._publish_tally()
+    assert event_names(drain(subscriber)) == ["tally"]
+    room.close()
+
+
+def test_thread_subscriber_sends_heartbeats_until_closed():
+    subscriber = ThreadSubscriber(4)
+    events = subscriber.events(heartbeat=0.01)
+    assert next(events) == HEARTBEAT
+    subscriber.offer(b"data: 1\n\n")
+    assert next(events) == b"data: 1\n\n"
+    subscriber.close()
+    assert list(events) == []
+
+
+def test_async_subscriber_receives_events_published_from_threads():
+    async def listen():
+        room = make_room()
+        subscriber = AsyncSubscriber(asyncio.get_running_loop(), room.queue_size)
+        room.subscribe(subscriber)
+        assert event_names([await subscriber.next_event()]) == ["state"]
+
+        await asyncio.get_running_loop().run_in_executor(None, room.advance)
+        assert event_names([await subscriber.next_event(heartbeat=1)]) == ["question"]
+        assert await subscriber.next_event(heartbeat=0.01) == HEARTBEAT
+
+        room.unsubscribe(subscriber)
+        assert room.subscriber_count() == 0
+        room.advance()
+        assert await subscriber.next_event(heartbeat=0.01) == HEARTBEAT
+
+        room.subscribe(subscriber)
+        room.close()
+        await asyncio.sleep(0)  # close() is handed to the subscriber's loop
+        assert await subscriber.next_event() is None
+
+    asyncio.run(listen())
+
+
+def test_subscriber_is_abstract():
+    with pytest.raises(TypeError):
+        Subscriber(4)
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from src.data_store import DataStore
+from src.snapshot import BinarySnapshot, SnapshotError, content_version, encode_snapshot
+
+DATA = {
+    "movies": [{"title": f"Movie {i}", "year": 2000 + i, "tags": ["a", "b"], "rating": i / 2} for i in range(50)],
+    "movie_source_info": "May 1, 2025",
+}
+
+
+def write_files(tmp_path):
+    raw = json.dumps(DATA, indent=2).encode("utf-8")
+    json_path, bin_path = tmp_path / "trivia_data.json", tmp_path / "trivia_data.bin"
+    json_path.write_bytes(raw)
+    bin_path.write_bytes(encode_snapshot(DATA.items(), content_version(raw)))
+    return str(json_path), str(bin_path)
+
+
+def test_round_trip(tmp_path):
+    _, bin_path = write_files(tmp_path)
+    snapshot = BinarySnapshot(bin_path)
+    snapshot.verify()
+    assert list(snapshot["movies"]) == DATA["movies"]
+    assert snapshot["movies"][10:12] == DATA["movies"][10:12]
+    assert snapshot["movie_source_info"] == DATA["movie_source_info"]
+
+
+@pytest.mark.parametrize("size", [0, 60, 100, 3000])
+def test_truncated_file_falls_back_to_json(tmp_path, size):
+    json_path, bin_path = write_files(tmp_path)
+    with open(bin_path, "rb") as f:
+        data = f.read()
+    assert size < len(data)
+    with open(bin_path, "wb") as f:
+        f.write(data[:size])
+
+    with pytest.raises(SnapshotError):
+        BinarySnapshot(bin_path)
+    snapshot = DataStore(json_path, binary_path=bin_path).get()
+    assert snapshot.format == "json"
+    assert snapshot.data == DATA
+
+
+def test_corrupt_content_falls_back_to_json(tmp_path):
+    json_path, bin_path = write_files(tmp_path)
+    with open(bin_path, "r+b") as f:
+        f.seek(os.path.getsize(bin_path) - 10)
+        f.write(b"\xff" * 10)
+
+    snapshot = DataStore(json_path, binary_path=bin_path).get()
+    assert snapshot.format == "json"
+    assert snapshot.data == DATA
+
+
+def test_decode_error_switches_store_to_json(tmp_path):
+    json_path, bin_path = write_files(tmp_path)
+    store = DataStore(json_path, check_interval=0, binary_path=bin_path)
+    snapshot = store.get()
+    assert snapshot.format == "binary"
+    # A bad record offset, as a file damaged after it was mapped would give
+    with pytest.raises(SnapshotError):
+        snapshot.data._decode_value(len(snapshot.data._mm))
+
+    store.reject_binary(SnapshotError("bad record"))
+    assert store.get().format == "json"
+    assert store.get().data == DATA
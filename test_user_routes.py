@@ -0,0 +1,45 @@
+import pytest
+from flask import Flask
+
+from src.models.user import User, db
+from src.routes.user import user_bp
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    app.register_blueprint(user_bp, url_prefix="/api")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_bulk_upsert_creates_and_updates(app):
+    client = app.test_client()
+    client.post("/api/users", json={"username": "ann", "email": "ann@example.com"})
+    response = client.post("/api/users/bulk", json={"users": [
+        {"username": "ann", "email": "ann@example.org"},
+        {"username": "bob", "email": "bob@example.com"},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json() == {"created": 1, "updated": 1, "unchanged": 0}
+    with app.app_context():
+        assert {u.username: u.email for u in User.query} == {"ann": "ann@example.org", "bob": "bob@example.com"}
+
+
+@pytest.mark.parametrize("entry", [
+    {"username": ["ann"], "email": "ann@example.com"},
+    {"username": "ann", "email": {"address": "ann@example.com"}},
+    {"username": 7, "email": "ann@example.com"},
+    {"username": "ann"},
+    "ann",
+])
+def test_bulk_upsert_rejects_malformed_entries(app, entry):
+    client = app.test_client()
+    response = client.post("/api/users/bulk", json={"users": [{"username": "bob", "email": "bob@example.com"}, entry]})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Entry 1 needs a username and an email."}
+    with app.app_context():
+        assert User.query.count() == 0
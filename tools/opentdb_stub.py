@@ -0,0 +1,176 @@
+"""Local stand-in for the OpenTDB API.
+
+Serves /api.php, /api_category.php and /api_token.php with deterministic
+generated questions so the app, the OpenTDB client and the benchmarks can run
+without network access. Latency and the 5-second rate limit can be simulated.
+
+Usage:
+    python tools/opentdb_stub.py --port 8901 --latency 0.2 --rate-limit 5
+    OPENTDB_BASE_URL=http://127.0.0.1:8901 python src/main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CATEGORIES = [
+    {"id": 9, "name": "General Knowledge"},
+    {"id": 11, "name": "Entertainment: Film"},
+    {"id": 12, "name": "Entertainment: Music"},
+    {"id": 21, "name": "Sports"},
+    {"id": 22, "name": "Geography"},
+    {"id": 23, "name": "History"},
+]
+DIFFICULTIES = ["easy", "medium", "hard"]
+QUESTIONS_PER_BUCKET = 120
+
+
+def build_question_pool(seed=0):
+    rng = random.Random(seed)
+    pool = []
+    for category in CATEGORIES:
+        for difficulty in DIFFICULTIES:
+            for n in range(QUESTIONS_PER_BUCKET):
+                q_type = "boolean" if n % 4 == 0 else "multiple"
+                if q_type == "boolean":
+                    correct, incorrect = rng.choice([("True", ["False"]), ("False", ["True"])])
+                else:
+                    correct = f"Answer {n}"
+                    incorrect = [f"Wrong {n}.{i}" for i in range(3)]
+                pool.append({
+                    "type": q_type,
+                    "difficulty": difficulty,
+                    "category": category["name"],
+                    "category_id": category["id"],
+                    "question": f"{category['name']} &quot;{difficulty}&quot; question #{n}?",
+                    "correct_answer": correct,
+                    "incorrect_answers": incorrect,
+                })
+    return pool
+
+
+class StubState:
+    def __init__(self, latency=0.0, rate_limit=0.0, seed=0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.pool = build_question_pool(seed)
+        self.tokens = {}
+        self.last_call = 0.0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state = None  # set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        state = self.state
+        if state.latency:
+            time.sleep(state.latency)
+        with state.lock:
+            state.calls += 1
+        if url.path == "/api_category.php":
+            return self._send({"trivia_categories": CATEGORIES})
+        if url.path == "/api_token.php":
+            return self._send(self._token(params))
+        if url.path == "/api.php":
+            return self._send(self._questions(params))
+        self._send({"error": "not found"}, status=404)
+
+    def _token(self, params):
+        state = self.state
+        with state.lock:
+            if params.get("command") == "request":
+                token = uuid.uuid4().hex
+                state.tokens[token] = set()
+                return {"response_code": 0, "token": token}
+            token = params.get("token")
+            if token not in state.tokens:
+                return {"response_code": 3}
+            state.tokens[token] = set()
+            return {"response_code": 0, "token": token}
+
+    def _questions(self, params):
+        state = self.state
+        with state.lock:
+            now = time.monotonic()
+            if state.rate_limit and now - state.last_call < state.rate_limit:
+                return {"response_code": 5, "results": []}
+            state.last_call = now
+
+            try:
+                amount = int(params.get("amount", 10))
+                category = int(params["category"]) if "category" in params else None
+            except ValueError:
+                return {"response_code": 2, "results": []}
+            if not 1 <= amount <= 50:
+                return {"response_code": 2, "results": []}
+
+            token = params.get("token")
+            seen = None
+            if token is not None:
+                if token not in state.tokens:
+                    return {"response_code": 3, "results": []}
+                seen = state.tokens[token]
+
+            matches = [
+                (i, q) for i, q in enumerate(state.pool)
+                if (category is None or q["category_id"] == category)
+                and params.get("difficulty", q["difficulty"]) == q["difficulty"]
+                and params.get("type", q["type"]) == q["type"]
+                and (seen is None or i not in seen)
+            ]
+            if len(matches) < amount:
+                return {"response_code": 4 if seen else 1, "results": []}
+            picked = random.sample(matches, amount)
+            if seen is not None:
+                seen.update(i for i, _ in picked)
+            results = [{k: v for k, v in q.items() if k != "category_id"} for _, q in picked]
+            return {"response_code": 0, "results": results}
+
+
+def make_server(host="127.0.0.1", port=0, latency=0.0, rate_limit=0.0, seed=0):
+    """Builds (but does not start) a stub server; port 0 picks a free port."""
+    handler = type("BoundStubHandler", (StubHandler,), {"state": StubState(latency, rate_limit, seed)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Starts a stub server on a daemon thread and returns (server, base_url)."""
+    server = make_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep per request")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="min seconds between /api.php calls (OpenTDB uses 5)")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.latency, args.rate_limit)
+    print(f"OpenTDB stub listening on http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()